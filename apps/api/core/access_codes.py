@@ -0,0 +1,97 @@
+from django.contrib.auth.models import User as AuthUser
+from django.db import connection, transaction
+import random
+
+from .models import User
+from .principal import invalidate_principals
+
+ACCESS_CODE_MIN = 100000
+ACCESS_CODE_MAX = 999999
+
+ROTATION_BATCH_SIZE = 1000
+
+
+class AccessCodesExhausted(Exception):
+    """Not enough unused 6-digit access codes left"""
+
+
+def lock_access_codes():
+    """
+    Block other writers to the users table until the end of the current
+    transaction, so codes allocated from a snapshot of the used set stay
+    unique. Reads are not blocked.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {User._meta.db_table} IN SHARE ROW EXCLUSIVE MODE')
+
+
+def allocate_access_codes(count, used=None):
+    """
+    Return `count` distinct random 6-digit codes that no user has. The used
+    codes are read once (or passed in as `used`); codes are then drawn
+    in memory instead of probing the database per code.
+    """
+    if used is None:
+        used = set(User.objects.values_list('access_code', flat=True))
+    used = {int(code) for code in used if str(code).isdigit()}
+
+    total = ACCESS_CODE_MAX - ACCESS_CODE_MIN + 1
+    free = total - len(used)
+    if count > free:
+        raise AccessCodesExhausted(f'Only {free} unused access codes left, {count} requested')
+
+    if len(used) + count > total // 2:
+        # Dense: sample from the explicit complement
+        available = [code for code in range(ACCESS_CODE_MIN, ACCESS_CODE_MAX + 1) if code not in used]
+        return [str(code) for code in random.sample(available, count)]
+
+    # Sparse: rejection sampling hits a free code at least half the time
+    chosen = set()
+    while len(chosen) < count:
+        code = random.randint(ACCESS_CODE_MIN, ACCESS_CODE_MAX)
+        if code not in used:
+            chosen.add(code)
+    return [str(code) for code in chosen]
+
+
+def delete_auth_users(access_codes=None):
+    """
+    Delete Django auth users named after access codes, which older versions
+    of core.auth.AccessCodeBackend created at login and nothing uses any
+    more. With `access_codes`, only those; without, all of them. Staff and
+    superuser accounts are never touched.
+    """
+    auth_users = AuthUser.objects.filter(is_staff=False, is_superuser=False)
+    if access_codes is not None:
+        auth_users = auth_users.filter(username__in=list(access_codes))
+    else:
+        auth_users = auth_users.filter(username__regex=r'^\d{6}$')
+    deleted, _ = auth_users.delete()
+    return deleted
+
+
+def rotate_access_codes(users, batch_size=ROTATION_BATCH_SIZE):
+    """
+    Give every user in the `users` queryset a new access code drawn from
+    the unused codes, in one transaction. The users' session principals are
+    invalidated (and leftover auth users for the old codes deleted), so
+    everyone rotated has to log in again with the new code.
+    Returns a list of (user, old_access_code) pairs.
+    """
+    with transaction.atomic():
+        lock_access_codes()
+        users = list(users.select_for_update(of=('self',)).order_by('id'))
+        if not users:
+            return []
+
+        codes = allocate_access_codes(len(users))
+        rotated = []
+        for user, code in zip(users, codes):
+            rotated.append((user, user.access_code))
+            user.access_code = code
+        User.objects.bulk_update(users, ['access_code'], batch_size=batch_size)
+
+        delete_auth_users(old_code for _, old_code in rotated)
+        invalidate_principals(user.id for user in users)
+
+    return rotated
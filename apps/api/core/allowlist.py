@@ -0,0 +1,153 @@
+from asgiref.sync import sync_to_async
+from bisect import bisect_right
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+import ipaddress
+import socket
+import threading
+import time
+import uuid
+
+# The version token lives in the cache every worker process shares, so
+# invalidate_allowlist() reaches all of them
+cache = ConnectionProxy(caches, 'shared')
+
+# Cache key holding the allowlist version token shared between workers
+ALLOWLIST_VERSION_KEY = 'allowed_ips_version'
+
+# How often (seconds) a worker looks at the version token at all
+_VERSION_CHECK_INTERVAL = 1.0
+
+_IPV4_MAPPED_PREFIX = 0xffff << 32
+
+
+def _parse_ip(ip):
+    """
+    Parse an IP address string into (version, integer) using inet_pton,
+    which is several times faster than ipaddress.ip_address(). IPv4-mapped
+    IPv6 addresses are folded into IPv4. Returns None if invalid.
+    """
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big')
+    except (OSError, TypeError):
+        pass
+    try:
+        value = int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), 'big')
+    except (OSError, TypeError):
+        return None
+    if value >> 32 == 0xffff:
+        return 4, value - _IPV4_MAPPED_PREFIX
+    return 6, value
+
+
+class CompiledAllowlist:
+    """
+    Allowed addresses and networks compiled into sorted, merged integer
+    intervals (one index per IP version) for bisect lookups.
+    """
+
+    def __init__(self, entries):
+        ranges = {4: [], 6: []}
+        for entry in entries:
+            try:
+                network = ipaddress.ip_network(entry, strict=False)
+            except ValueError:
+                continue
+            ranges[network.version].append(
+                (int(network.network_address), int(network.broadcast_address))
+            )
+
+        self._starts = {}
+        self._ends = {}
+        for version, intervals in ranges.items():
+            starts, ends = [], []
+            for start, end in sorted(intervals):
+                if ends and start <= ends[-1] + 1:
+                    # Overlapping or adjacent: extend the previous interval
+                    ends[-1] = max(ends[-1], end)
+                else:
+                    starts.append(start)
+                    ends.append(end)
+            self._starts[version] = starts
+            self._ends[version] = ends
+
+    def __len__(self):
+        return sum(len(starts) for starts in self._starts.values())
+
+    def contains(self, ip):
+        """Check whether an IP address string falls inside any allowed range"""
+        parsed = _parse_ip(ip)
+        if parsed is None:
+            return False
+
+        version, value = parsed
+        index = bisect_right(self._starts[version], value) - 1
+        return index >= 0 and value <= self._ends[version][index]
+
+
+_lock = threading.Lock()
+_allowlist = None
+_loaded_version = None
+_checked_at = 0.0
+
+
+def _cache_timeout():
+    return getattr(settings, 'ALLOWED_IP_CACHE_TIMEOUT', 60)
+
+
+def _load():
+    from .models import AllowedIP
+    return CompiledAllowlist(AllowedIP.objects.values_list('ip_address', flat=True))
+
+
+def get_allowlist():
+    """
+    Return this process's compiled allowlist, recompiling it when the shared
+    version token changed or expired.
+    """
+    global _allowlist, _loaded_version, _checked_at
+
+    now = time.monotonic()
+    allowlist = _allowlist
+    if allowlist is not None and now - _checked_at < _VERSION_CHECK_INTERVAL:
+        return allowlist
+
+    with _lock:
+        version = cache.get(ALLOWLIST_VERSION_KEY)
+        if version is None:
+            # Token expired (or was never set): publish a new one and reload,
+            # so workers without a shared cache still refresh periodically
+            cache.add(ALLOWLIST_VERSION_KEY, uuid.uuid4().hex, _cache_timeout())
+            version = cache.get(ALLOWLIST_VERSION_KEY)
+
+        if _allowlist is None or version != _loaded_version:
+            _allowlist = _load()
+            _loaded_version = version
+        _checked_at = time.monotonic()
+        return _allowlist
+
+
+def invalidate_allowlist():
+    """Publish a new version token and drop this process's compiled list"""
+    global _allowlist
+    cache.set(ALLOWLIST_VERSION_KEY, uuid.uuid4().hex, _cache_timeout())
+    with _lock:
+        _allowlist = None
+
+
+def is_ip_allowed(ip):
+    """Check an IP address against the allowed addresses and networks"""
+    return get_allowlist().contains(ip)
+
+
+async def ais_ip_allowed(ip):
+    """
+    is_ip_allowed for async views: answered from this process's compiled
+    list while it is fresh, otherwise in a thread (it may reload from the
+    database)
+    """
+    allowlist = _allowlist
+    if allowlist is not None and time.monotonic() - _checked_at < _VERSION_CHECK_INTERVAL:
+        return allowlist.contains(ip)
+    return await sync_to_async(is_ip_allowed)(ip)
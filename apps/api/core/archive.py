@@ -0,0 +1,279 @@
+from contextlib import contextmanager
+from datetime import timezone as dt_timezone
+import heapq
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .archive_file import ArchiveError, ArchiveFile, ArchivedLog, write_archive
+from .models import TimeLog, TimeLogArchive, User
+from .partitions import add_months, month_partition_name, month_start
+
+# Postgres advisory lock held by an archive run, so two runs never rewrite
+# the same month at once
+ARCHIVE_LOCK_KEY = 0x544c4152
+
+# Only rows still identical to what was archived are deleted; a log edited
+# while the run was in progress stays and is archived again next time
+DELETE_ARCHIVED_SQL = """
+    DELETE FROM time_logs t
+    USING unnest(%s::bigint[], %s::timestamptz[], %s::timestamptz[]) AS a(id, clock_in, clock_out)
+    WHERE t.id = a.id AND t.clock_in = a.clock_in AND t.clock_out = a.clock_out
+      AND t.clock_in >= %s AND t.clock_in < %s
+"""
+
+
+class ArchiveBusy(Exception):
+    """Another archive run holds the archive lock"""
+
+
+class ArchiveStats:
+    """Totals collected while archiving"""
+
+    def __init__(self):
+        self.periods = []
+        self.archived = 0
+        self.deleted = 0
+        self.kept = 0
+        self.batches = 0
+        self.elapsed = 0.0
+
+
+def archive_dir():
+    if not settings.TIME_LOG_ARCHIVE_DIR:
+        raise ArchiveError('TIME_LOG_ARCHIVE_DIR is not set')
+    return settings.TIME_LOG_ARCHIVE_DIR
+
+
+def retention_boundary(months=None, now=None):
+    """Start of the oldest month kept in time_logs"""
+    if months is None:
+        months = settings.TIME_LOG_RETENTION_MONTHS
+    return add_months(month_start(now or timezone.now()), -months)
+
+
+_open_files = {}
+_open_files_lock = threading.Lock()
+
+
+def _open(record):
+    with _open_files_lock:
+        archive = _open_files.get(record.period_start)
+        if archive is None or archive.path != os.path.join(archive_dir(), record.path):
+            # A replaced file is unmapped once the last reader lets go of it
+            archive = ArchiveFile(os.path.join(archive_dir(), record.path))
+            _open_files[record.period_start] = archive
+    return archive
+
+
+def open_archive(record):
+    """The mapped file of a TimeLogArchive, kept open for the life of the process"""
+    try:
+        return _open(record)
+    except ArchiveError:
+        # The month may have been rewritten since the record was read
+        record.refresh_from_db()
+        return _open(record)
+
+
+def archived_periods(start=None, end=None):
+    """TimeLogArchive records of the months overlapping [start, end), oldest first"""
+    records = TimeLogArchive.objects.order_by('period_start')
+    if start is not None:
+        records = records.filter(period_end__gt=start)
+    if end is not None:
+        records = records.filter(period_start__lt=end)
+    return list(records)
+
+
+def archived_logs(user_ids=None, start=None, end=None):
+    """
+    Yield the archived logs of `user_ids` (default: every existing user)
+    clocked in within [start, end), month by month, each month in
+    (user_id, clock_in, id) order
+    """
+    records = archived_periods(start, end)
+    if not records:
+        return
+    if user_ids is None:
+        # History of deleted users is dropped when their month is next rewritten
+        user_ids = User.objects.values_list('id', flat=True)
+    user_ids = set(user_ids)
+    for record in records:
+        yield from open_archive(record).logs(user_ids, start, end)
+
+
+def user_archived_logs(user_id, start=None, end=None, descending=False):
+    """One user's archived logs within [start, end) in (clock_in, id) order, or newest first"""
+    records = archived_periods(start, end)
+    if descending:
+        records.reverse()
+    for record in records:
+        logs = list(open_archive(record).logs([user_id], start, end))
+        if descending:
+            logs.reverse()
+        yield from logs
+
+
+def archived_user_ids(start=None, end=None):
+    """Ids of users with archived logs in the months overlapping [start, end)"""
+    user_ids = set()
+    for record in archived_periods(start, end):
+        user_ids.update(open_archive(record).user_ids)
+    return user_ids
+
+
+def archived_log_count():
+    return TimeLogArchive.objects.aggregate(total=Sum('row_count'))['total'] or 0
+
+
+def as_time_log(log):
+    """An unsaved TimeLog for an archived log, for code written against the model"""
+    return TimeLog(
+        id=log.id, user_id=log.user_id, clock_in=log.clock_in,
+        clock_out=log.clock_out, created_at=log.created_at
+    )
+
+
+def merge_archived(rows, archived, key, reverse=False):
+    """
+    Merge time_logs rows with archived logs, both sorted by `key` and both
+    with the log id first. A log that is in both (an archive run is deleting
+    it from time_logs right now) is yielded once.
+    """
+    seen = set()
+    for row in heapq.merge(rows, archived, key=key, reverse=reverse):
+        if row[0] not in seen:
+            seen.add(row[0])
+            yield row
+
+
+@contextmanager
+def _archive_lock():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_lock(%s)', [ARCHIVE_LOCK_KEY])
+        if not cursor.fetchone()[0]:
+            raise ArchiveBusy('Another archive run is in progress')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', [ARCHIVE_LOCK_KEY])
+
+
+def months_to_archive(before):
+    """Months with closed logs clocked in before `before`, oldest first"""
+    return list(
+        TimeLog.objects
+        .filter(clock_out__isnull=False, clock_in__lt=before)
+        .annotate(month=TruncMonth('clock_in', tzinfo=dt_timezone.utc))
+        .order_by('month')
+        .values_list('month', flat=True)
+        .distinct()
+    )
+
+
+def archive_month(month, stats, batch_size=1000, pause=0.0):
+    """
+    Fold the closed logs of one month into its archive file, then delete
+    them from time_logs in batches of `batch_size`. The file is written and
+    read back before its record is saved, and only rows the file is
+    verified to hold are deleted.
+    """
+    end = add_months(month, 1)
+    rows = list(
+        TimeLog.objects
+        .filter(clock_out__isnull=False, clock_in__gte=month, clock_in__lt=end)
+        .order_by('id')
+        .values_list('id', 'user_id', 'clock_in', 'clock_out', 'created_at')
+    )
+    if not rows:
+        return
+
+    record = TimeLogArchive.objects.filter(period_start=month).first()
+    logs = {}
+    if record is not None:
+        for log in archived_logs(None, month, end):
+            logs[log.id] = log
+    logs.update((row[0], ArchivedLog(*row)) for row in rows)
+
+    name = f'{month_partition_name(month)}.{timezone.now():%Y%m%d%H%M%S%f}.tla'
+    path = os.path.join(archive_dir(), name)
+    row_count, user_count, size = write_archive(path, month, end, logs.values())
+
+    written = ArchiveFile(path)
+    stored = {log.id: (log.clock_in, log.clock_out) for log in written.logs()}
+    written.close()
+    if any(stored.get(row[0]) != (row[2], row[3]) for row in rows):
+        os.remove(path)
+        raise ArchiveError(f'{path} does not hold the logs written to it')
+
+    with transaction.atomic():
+        TimeLogArchive.objects.update_or_create(
+            period_start=month,
+            defaults={
+                'period_end': end,
+                'path': name,
+                'row_count': row_count,
+                'user_count': user_count,
+                'size_bytes': size,
+            }
+        )
+    if record is not None and record.path != name:
+        try:
+            os.remove(os.path.join(archive_dir(), record.path))
+        except FileNotFoundError:
+            pass
+
+    deleted = 0
+    for offset in range(0, len(rows), batch_size):
+        batch = rows[offset:offset + batch_size]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(DELETE_ARCHIVED_SQL, [
+                [row[0] for row in batch], [row[2] for row in batch], [row[3] for row in batch],
+                month, end,
+            ])
+            deleted += cursor.rowcount
+        stats.batches += 1
+        if pause and offset + batch_size < len(rows):
+            time.sleep(pause)
+
+    stats.periods.append(month)
+    stats.archived += len(rows)
+    stats.deleted += deleted
+    stats.kept += len(rows) - deleted
+
+
+def archive_time_logs(before=None, batch_size=1000, pause=0.0):
+    """
+    Move closed logs clocked in before `before` (default: the retention
+    boundary, TIME_LOG_RETENTION_MONTHS back) out of time_logs into one
+    archive file per month under TIME_LOG_ARCHIVE_DIR, which must be set
+    (and, outside DEBUG, already exist). Months archived before are
+    rewritten with the new logs merged in. Open shifts are never archived.
+    The weekly rollup is left as it is.
+    """
+    before = month_start(before or retention_boundary())
+    stats = ArchiveStats()
+    started = time.monotonic()
+
+    # Outside development the directory must already exist (a mounted
+    # volume); creating it could put archives on storage a deploy wipes
+    directory = archive_dir()
+    if settings.DEBUG:
+        os.makedirs(directory, exist_ok=True)
+    elif not os.path.isdir(directory):
+        raise ArchiveError(f'TIME_LOG_ARCHIVE_DIR {directory} does not exist')
+
+    with _archive_lock():
+        for month in months_to_archive(before):
+            archive_month(month, stats, batch_size=batch_size, pause=pause)
+
+    stats.elapsed = time.monotonic() - started
+    return stats
\ No newline at end of file
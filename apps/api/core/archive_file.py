@@ -0,0 +1,192 @@
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+import mmap
+import os
+import struct
+import sys
+import zlib
+
+# On-disk layout of a time log archive file (all integers little-endian):
+#
+#   header      magic, user count, row count, period start, period end (µs)
+#   user_ids    int32  x users, ascending
+#   row_counts  uint32 x users
+#   offsets     uint64 x users  (byte offset of each user's block)
+#   lengths     uint32 x users  (compressed size of each user's block)
+#   blocks      one zlib block per user holding four int64 columns for their
+#               logs in (clock_in, id) order: id, clock_in as a delta from the
+#               previous clock_in (the first from the period start), duration,
+#               and created_at as an offset from clock_in
+#
+# The index is uncompressed so it is read in place through mmap; a lookup
+# binary-searches user_ids and decompresses only that user's block.
+ARCHIVE_MAGIC = b'TLARCHV1'
+_HEADER = struct.Struct('<8sIIqq')
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_LITTLE_ENDIAN = sys.byteorder == 'little'
+
+ArchivedLog = namedtuple('ArchivedLog', 'id user_id clock_in clock_out created_at')
+
+
+class ArchiveError(Exception):
+    """An archive file is missing, truncated or not an archive"""
+
+
+def _micros(moment):
+    return (moment - _EPOCH) // timedelta(microseconds=1)
+
+
+def _moment(micros):
+    return _EPOCH + timedelta(microseconds=micros)
+
+
+def _to_bytes(values):
+    if not _LITTLE_ENDIAN:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _column(buffer, typecode, offset, count):
+    """A read-only view of `count` integers at `offset`, without copying where possible"""
+    size = array(typecode).itemsize * count
+    view = memoryview(buffer)[offset:offset + size]
+    if _LITTLE_ENDIAN:
+        return view.cast(typecode)
+    values = array(typecode, view.tobytes())
+    values.byteswap()
+    return values
+
+
+def write_archive(path, period_start, period_end, logs):
+    """
+    Write closed logs (ArchivedLog, or any tuple in that field order) to an
+    archive file at `path`. The file is written beside `path` and renamed
+    over it once synced, so readers only ever see a complete file.
+    Returns (row count, user count, size in bytes).
+    """
+    by_user = {}
+    for log in logs:
+        by_user.setdefault(log[1], []).append(log)
+    user_ids = sorted(by_user)
+
+    blocks = []
+    row_counts = array('I')
+    for user_id in user_ids:
+        user_logs = sorted(by_user[user_id], key=lambda log: (log[2], log[0]))
+        ids, clock_ins, durations, created = array('q'), array('q'), array('q'), array('q')
+        previous = _micros(period_start)
+        for log_id, _, clock_in, clock_out, created_at in user_logs:
+            clock_in_micros = _micros(clock_in)
+            ids.append(log_id)
+            clock_ins.append(clock_in_micros - previous)
+            durations.append(_micros(clock_out) - clock_in_micros)
+            created.append(_micros(created_at) - clock_in_micros)
+            previous = clock_in_micros
+        columns = b''.join(_to_bytes(column) for column in (ids, clock_ins, durations, created))
+        blocks.append(zlib.compress(columns, 9))
+        row_counts.append(len(user_logs))
+
+    users = len(user_ids)
+    offset = _HEADER.size + users * (4 + 4 + 8 + 4)
+    offsets, lengths = array('Q'), array('I')
+    for block in blocks:
+        offsets.append(offset)
+        lengths.append(len(block))
+        offset += len(block)
+
+    rows = sum(row_counts)
+    temporary = f'{path}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(_HEADER.pack(ARCHIVE_MAGIC, users, rows, _micros(period_start), _micros(period_end)))
+        for column in (array('i', user_ids), row_counts, offsets, lengths):
+            f.write(_to_bytes(column))
+        for block in blocks:
+            f.write(block)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+    return rows, users, offset
+
+
+class ArchiveFile:
+    """A memory-mapped archive file"""
+
+    def __init__(self, path):
+        try:
+            with open(path, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise ArchiveError(f'Cannot open time log archive {path}: {e}')
+
+        if len(self._map) < _HEADER.size:
+            raise ArchiveError(f'{path} is not a time log archive')
+        magic, users, self.row_count, start, end = _HEADER.unpack_from(self._map, 0)
+        if magic != ARCHIVE_MAGIC:
+            raise ArchiveError(f'{path} is not a time log archive')
+
+        self.path = path
+        self.period_start = _moment(start)
+        self.period_end = _moment(end)
+        offset = _HEADER.size
+        self.user_ids = _column(self._map, 'i', offset, users)
+        self._row_counts = _column(self._map, 'I', offset + 4 * users, users)
+        self._offsets = _column(self._map, 'Q', offset + 8 * users, users)
+        self._lengths = _column(self._map, 'I', offset + 16 * users, users)
+
+    def __len__(self):
+        return self.row_count
+
+    def _position(self, user_id):
+        position = bisect_left(self.user_ids, user_id)
+        if position < len(self.user_ids) and self.user_ids[position] == user_id:
+            return position
+        return None
+
+    def _block(self, position):
+        user_id = self.user_ids[position]
+        count = self._row_counts[position]
+        offset = self._offsets[position]
+        try:
+            data = zlib.decompress(self._map[offset:offset + self._lengths[position]])
+        except zlib.error as e:
+            raise ArchiveError(f'Corrupt block for user {user_id} in {self.path}: {e}')
+        if len(data) != 32 * count:
+            raise ArchiveError(f'Corrupt block for user {user_id} in {self.path}')
+
+        ids, deltas, durations, created = (
+            _column(data, 'q', 8 * count * index, count) for index in range(4)
+        )
+        clock_in = _micros(self.period_start)
+        for index in range(count):
+            clock_in += deltas[index]
+            yield ArchivedLog(
+                ids[index],
+                user_id,
+                _moment(clock_in),
+                _moment(clock_in + durations[index]),
+                _moment(clock_in + created[index]),
+            )
+
+    def logs(self, user_ids=None, start=None, end=None):
+        """
+        Yield the archived logs of `user_ids` (default: everyone) clocked in
+        within [start, end), in (user_id, clock_in, id) order
+        """
+        if user_ids is None:
+            positions = range(len(self.user_ids))
+        else:
+            positions = sorted(
+                position for position in map(self._position, set(user_ids)) if position is not None
+            )
+        for position in positions:
+            for log in self._block(position):
+                if (start is None or log.clock_in >= start) and (end is None or log.clock_in < end):
+                    yield log
+
+    def close(self):
+        self.user_ids = self._row_counts = self._offsets = self._lengths = None
+        self._map.close()
\ No newline at end of file
@@ -1,10 +1,13 @@
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
 from django.contrib.auth.backends import BaseBackend
-from django.contrib.auth.models import User as AuthUser
+from django.middleware.csrf import rotate_token
 from .models import User
 
 class AccessCodeBackend(BaseBackend):
     """
-    Custom authentication backend that authenticates users by access_code
+    Custom authentication backend that authenticates users by access_code.
+    The authenticated user is the core User itself; no Django auth user is
+    created or looked up.
     """
     
     def authenticate(self, request, access_code=None, **kwargs):
@@ -12,24 +15,39 @@ class AccessCodeBackend(BaseBackend):
             return None
         
         try:
-            # Find our custom user by access code
-            custom_user = User.objects.get(access_code=access_code)
-            
-            # Get or create the corresponding Django auth user
-            auth_user, created = AuthUser.objects.get_or_create(
-                username=custom_user.access_code,
-                defaults={
-                    'first_name': custom_user.full_name,
-                    'is_active': True,
-                }
-            )
-            
-            return auth_user
+            # Find our custom user by access code (unique index)
+            return User.objects.get(access_code=access_code)
         except User.DoesNotExist:
             return None
     
     def get_user(self, user_id):
         try:
-            return AuthUser.objects.get(pk=user_id)
-        except AuthUser.DoesNotExist:
-            return None 
\ No newline at end of file
+            return User.objects.get(pk=user_id)
+        except (User.DoesNotExist, ValueError, TypeError):
+            return None
+
+
+def login_user(request, user, backend='core.auth.AccessCodeBackend'):
+    """
+    Persist a core User in the session, like django.contrib.auth.login but
+    without the user_logged_in signal, whose last_login update only works
+    for Django auth users.
+    """
+    session_auth_hash = user.get_session_auth_hash()
+    
+    if SESSION_KEY in request.session:
+        if (
+            request.session[SESSION_KEY] != str(user.pk)
+            or request.session.get(BACKEND_SESSION_KEY) != backend
+            or request.session.get(HASH_SESSION_KEY) != session_auth_hash
+        ):
+            # A different user was logged in; don't reuse their session data
+            request.session.flush()
+    else:
+        request.session.cycle_key()
+    
+    request.session[SESSION_KEY] = str(user.pk)
+    request.session[BACKEND_SESSION_KEY] = backend
+    request.session[HASH_SESSION_KEY] = session_auth_hash
+    request.user = user
+    rotate_token(request)
@@ -0,0 +1,218 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, time, timedelta
+import csv
+import gzip
+import io
+import multiprocessing
+import zipfile
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .archive import archived_logs, archived_user_ids
+from .export import EXPORT_CHUNK_SIZE, Echo, format_time_log
+from .models import Committee, TimeLog, User
+
+ORG_CSV_HEADER = ['Access Code', 'Full Name', 'Date', 'Clock In', 'Clock Out', 'Duration (hours)']
+
+PARTITION_CHOICES = ('month', 'user')
+ARCHIVE_CHOICES = ('gzip', 'zip')
+
+# Users rendered together when partitioning by user
+USERS_PER_PART = 50
+
+
+class ExportPart:
+    """
+    One independently rendered slice of an export: the logs clocked in
+    between start and end matching `filters` (plain ORM lookups, so the part
+    can be pickled to a worker process).
+    """
+
+    def __init__(self, name, start, end, filters=None):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.filters = filters or {}
+
+
+def get_export_range(start_date, end_date):
+    """Turn inclusive start/end dates into a [start, end) datetime range"""
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(start_date, time.min), tz)
+    end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min), tz)
+    return start, end
+
+
+def month_parts(start, end):
+    """Split a range at calendar month boundaries"""
+    parts = []
+    current = start
+    while current < end:
+        first = current.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        next_month = (first + timedelta(days=32)).replace(day=1)
+        part_end = min(next_month, end)
+        parts.append(ExportPart(current.strftime('%Y-%m'), current, part_end))
+        current = part_end
+    return parts
+
+
+def user_parts(start, end, size=USERS_PER_PART):
+    """Split a range into groups of users that have logs in it"""
+    user_ids = set(
+        TimeLog.objects.filter(clock_in__gte=start, clock_in__lt=end)
+        .order_by().values_list('user_id', flat=True).distinct()
+    )
+    user_ids = sorted(user_ids | archived_user_ids(start, end))
+    return [
+        ExportPart(f'users-{index + 1}', start, end, {'user_id__in': user_ids[offset:offset + size]})
+        for index, offset in enumerate(range(0, len(user_ids), size))
+    ]
+
+
+def committee_parts(start, end):
+    """One part per committee, plus one for users outside any committee"""
+    parts = [
+        ExportPart(slugify(name) or f'committee-{committee_id}', start, end,
+                   {'user__usercommittee__committee_id': committee_id})
+        for committee_id, name in Committee.objects.order_by('name').values_list('id', 'name')
+    ]
+    parts.append(ExportPart('no-committee', start, end, {'user__usercommittee__isnull': True}))
+    return parts
+
+
+def org_time_log_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE, archived=None):
+    """
+    Like export.time_log_rows, prefixed with the member's access code and
+    name. With archived logs the rows are sorted here by name, user and
+    clock in instead of by the database.
+    """
+    values = queryset.values_list(
+        'id', 'user_id', 'user__access_code', 'user__full_name', 'clock_in', 'clock_out'
+    ).iterator(chunk_size=chunk_size)
+    if archived:
+        users = {
+            user_id: (access_code, full_name)
+            for user_id, access_code, full_name in User.objects.filter(
+                id__in={log.user_id for log in archived}
+            ).values_list('id', 'access_code', 'full_name')
+        }
+        # A log still in time_logs wins over its archived copy
+        merged = {
+            log.id: (log.id, log.user_id, *users[log.user_id], log.clock_in, log.clock_out)
+            for log in archived if log.user_id in users
+        }
+        merged.update((row[0], row) for row in values)
+        values = sorted(merged.values(), key=lambda row: (row[3], row[1], row[4]))
+    for _, _, access_code, full_name, clock_in, clock_out in values:
+        yield [access_code, full_name, *format_time_log(clock_in, clock_out)]
+
+
+def archived_part_logs(part):
+    """The archived logs belonging in a part"""
+    user_ids = None
+    if part.filters:
+        # The part's TimeLog lookups, applied to User
+        lookups = {
+            'id__in' if lookup == 'user_id__in' else lookup.removeprefix('user__'): value
+            for lookup, value in part.filters.items()
+        }
+        user_ids = User.objects.filter(**lookups).values_list('id', flat=True)
+    return list(archived_logs(user_ids, part.start, part.end))
+
+
+def render_part(part, header=False, compress=False):
+    """Render one part as CSV bytes (optionally as a standalone gzip member)"""
+    queryset = TimeLog.objects.filter(
+        clock_in__gte=part.start, clock_in__lt=part.end, **part.filters
+    ).order_by('user__full_name', 'user_id', 'clock_in')
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(ORG_CSV_HEADER)
+    writer.writerows(org_time_log_rows(queryset, archived=archived_part_logs(part)))
+
+    data = buffer.getvalue().encode('utf-8')
+    return gzip.compress(data) if compress else data
+
+
+def _render_gzip_part(part):
+    return render_part(part, compress=True)
+
+
+def _render_csv_part(part):
+    return render_part(part, header=True)
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def _map_parts(func, parts, workers):
+    """Render parts in order, in a process pool when more than one worker is allowed"""
+    if workers <= 1 or len(parts) <= 1:
+        for part in parts:
+            yield func(part)
+        return
+
+    # Spawned workers set Django up themselves and open their own connections
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(parts)), mp_context=context, initializer=_init_worker
+    ) as pool:
+        yield from pool.map(func, parts)
+
+
+class _ChunkBuffer:
+    """Write-only file object collecting zipfile output between yields"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def export_org_timesheets(start_date, end_date, partition='month', archive='gzip', workers=None):
+    """
+    Yield an organisation-wide timesheet export for the inclusive date range
+    as byte chunks. The 'gzip' archive is a single CSV made of one gzip member
+    per partition (by month or by user); 'zip' holds one CSV per committee.
+    Partitions are rendered in a process pool of `workers`
+    (default: settings.EXPORT_WORKERS). Archived history is included.
+    """
+    if workers is None:
+        workers = getattr(settings, 'EXPORT_WORKERS', 1)
+    start, end = get_export_range(start_date, end_date)
+
+    if archive == 'zip':
+        parts = committee_parts(start, end)
+        buffer = _ChunkBuffer()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            for part, data in zip(parts, _map_parts(_render_csv_part, parts, workers)):
+                zip_file.writestr(f'{part.name}.csv', data)
+                yield buffer.drain()
+        yield buffer.drain()
+        return
+
+    parts = month_parts(start, end) if partition == 'month' else user_parts(start, end)
+    # Concatenated gzip members decompress as one stream
+    yield gzip.compress(csv.writer(Echo()).writerow(ORG_CSV_HEADER).encode('utf-8'))
+    yield from _map_parts(_render_gzip_part, parts, workers)
+
+
+def export_filename(start_date, end_date, archive='gzip'):
+    extension = 'zip' if archive == 'zip' else 'csv.gz'
+    return f'timesheets_{start_date:%Y-%m-%d}_{end_date:%Y-%m-%d}.{extension}'
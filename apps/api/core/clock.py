@@ -0,0 +1,116 @@
+from django.db import OperationalError, transaction
+from django.utils import timezone
+
+from .models import TimeLog
+from .presence import publish_clock_events
+from .stats import record_session
+
+# Close the user's open time log if there is one, otherwise open a new one,
+# in a single statement. The partial unique index idx_one_open_shift_per_user
+# makes a concurrent second open log impossible; losing that race returns no
+# row instead of raising. New logs are inserted straight into the open-shift
+# partition, since ON CONFLICT can only use an index of the table it targets.
+TOGGLE_SQL = """
+    WITH closed AS (
+        UPDATE time_logs SET clock_out = %(now)s
+        WHERE user_id = %(user_id)s AND clock_out IS NULL
+        RETURNING id, user_id, clock_in, clock_out, created_at
+    ), opened AS (
+        INSERT INTO time_logs_open (user_id, clock_in, created_at)
+        SELECT %(user_id)s, %(now)s, %(now)s
+        WHERE NOT EXISTS (SELECT 1 FROM closed)
+        ON CONFLICT (user_id) WHERE clock_out IS NULL DO NOTHING
+        RETURNING id, user_id, clock_in, clock_out, created_at
+    )
+    SELECT * FROM closed
+    UNION ALL
+    SELECT * FROM opened
+"""
+
+
+CLOCK_IN_SQL = """
+    INSERT INTO time_logs_open (user_id, clock_in, created_at)
+    VALUES (%(user_id)s, %(now)s, %(now)s)
+    ON CONFLICT (user_id) WHERE clock_out IS NULL DO NOTHING
+    RETURNING id, user_id, clock_in, clock_out, created_at
+"""
+
+CLOCK_OUT_SQL = """
+    UPDATE time_logs SET clock_out = %(now)s
+    WHERE user_id = %(user_id)s AND clock_out IS NULL
+    RETURNING id, user_id, clock_in, clock_out, created_at
+"""
+
+
+class ClockConflict(Exception):
+    """The requested transition does not match the user's clock state"""
+
+
+def _moved_concurrently(error):
+    """
+    Closing a shift moves its row from the open-shift partition to a closed
+    one. A concurrent statement that was waiting on that row then fails with
+    a serialization error instead of re-checking it.
+    """
+    return getattr(error.__cause__, 'pgcode', None) == '40001'
+
+
+def _run(sql, user_id, now):
+    logs = list(TimeLog.objects.raw(sql, {'user_id': user_id, 'now': now}))
+    return logs[0] if logs else None
+
+
+def clock_in(user_id, now=None):
+    """
+    Open a time log for the user in one conditional INSERT. Raises
+    ClockConflict if they already have an open one (including one opened
+    concurrently), instead of an IntegrityError.
+    """
+    time_log = _run(CLOCK_IN_SQL, user_id, now or timezone.now())
+    if time_log is None:
+        raise ClockConflict('User is already clocked in')
+    publish_clock_events([time_log])
+    return time_log
+
+
+def clock_out(user_id, now=None):
+    """
+    Close the user's open time log in one conditional UPDATE and fold it into
+    the weekly rollup. Raises ClockConflict if nothing was open (including
+    when a concurrent request closed it first).
+    """
+    try:
+        with transaction.atomic():
+            time_log = _run(CLOCK_OUT_SQL, user_id, now or timezone.now())
+            if time_log is None:
+                raise ClockConflict('No active clock-in session found')
+            record_session(time_log)
+            publish_clock_events([time_log])
+    except OperationalError as e:
+        if not _moved_concurrently(e):
+            raise
+        raise ClockConflict('No active clock-in session found')
+    return time_log
+
+
+def toggle(user_id, now=None):
+    """
+    Clock the user out if they are clocked in, or in if they are not.
+    Closed sessions are folded into the weekly rollup in the same
+    transaction. Returns the resulting TimeLog.
+    """
+    if now is None:
+        now = timezone.now()
+
+    try:
+        with transaction.atomic():
+            time_log = _run(TOGGLE_SQL, user_id, now)
+            if time_log is None:
+                raise ClockConflict('User was clocked in by another request')
+            record_session(time_log)
+            publish_clock_events([time_log])
+    except OperationalError as e:
+        if not _moved_concurrently(e):
+            raise
+        raise ClockConflict('User was clocked out by another request')
+    return time_log
@@ -0,0 +1,183 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, connection, connections
+from django.db.models import Count
+from django.utils.connection import ConnectionProxy
+import asyncio
+import logging
+import threading
+import time
+
+from .archive import archived_log_count
+from .models import TimeLog, User
+from .presence_registry import online_count
+from .serializers import TimeLogSerializer
+
+logger = logging.getLogger(__name__)
+
+# Cached in the cache every worker process shares, so they all serve (and
+# refresh) one copy
+cache = ConnectionProxy(caches, 'shared')
+
+DASHBOARD_CACHE_KEY = 'admin_dashboard:{mode}'
+
+# Postgres advisory lock (with the mode as second key) held while a worker
+# recomputes the dashboard in the background
+DASHBOARD_REFRESH_LOCK_KEY = 0x44415348
+
+RECENT_ACTIVITY_LIMIT = 10
+
+
+def _fresh_seconds():
+    return getattr(settings, 'DASHBOARD_FRESH_SECONDS', 30)
+
+
+def _max_stale_seconds():
+    return getattr(settings, 'DASHBOARD_MAX_STALE_SECONDS', 3600)
+
+
+def approximate_count(model):
+    """
+    Row count of a model's table from the planner statistics in pg_class
+    (kept current by autovacuum/ANALYZE), without scanning the table. A
+    partitioned table has no statistics of its own, so its leaf partitions
+    are summed. Falls back to COUNT(*) when nothing was analyzed yet.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT SUM(GREATEST(c.reltuples, 0))::bigint, MAX(c.reltuples) '
+            'FROM pg_partition_tree(%s::regclass) p JOIN pg_class c ON c.oid = p.relid '
+            'WHERE p.isleaf',
+            [model._meta.db_table]
+        )
+        total, analyzed = cursor.fetchone()
+    if total is None or analyzed < 0:
+        return model.objects.count()
+    return total
+
+
+def _total_logs(approximate):
+    return approximate_count(TimeLog) if approximate else TimeLog.objects.count()
+
+
+def _role_distribution():
+    return list(User.objects.values('role').annotate(count=Count('id')).order_by('role'))
+
+
+def _recent_activity():
+    recent_logs = TimeLog.objects.select_related('user').order_by('-clock_in')[:RECENT_ACTIVITY_LIMIT]
+    return TimeLogSerializer(recent_logs, many=True).data
+
+
+def _payload(approximate, total_users, total_logs, archived_logs, role_distribution, recent_activity):
+    return {
+        'total_users': total_users,
+        'total_logs': total_logs + archived_logs,
+        'archived_logs': archived_logs,
+        'total_logs_approximate': approximate,
+        'role_distribution': role_distribution,
+        'recent_activity': recent_activity,
+    }
+
+
+def compute_dashboard(approximate=False):
+    """The admin dashboard payload, computed from the database (except active_sessions)"""
+    return _payload(
+        approximate,
+        User.objects.count(),
+        _total_logs(approximate),
+        archived_log_count(),
+        _role_distribution(),
+        _recent_activity(),
+    )
+
+
+async def _on_own_connection(func, *args):
+    """
+    Run a query function in a pool thread, so on a database connection of
+    its own; the ORM's own async methods all share the request's one
+    """
+    def run():
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+
+    return await sync_to_async(run, thread_sensitive=False)()
+
+
+async def acompute_dashboard(approximate=False):
+    """compute_dashboard with its independent queries running concurrently"""
+    results = await asyncio.gather(
+        _on_own_connection(User.objects.count),
+        _on_own_connection(_total_logs, approximate),
+        _on_own_connection(archived_log_count),
+        _on_own_connection(_role_distribution),
+        _on_own_connection(_recent_activity),
+    )
+    return _payload(approximate, *results)
+
+
+def _cache_key(approximate):
+    return DASHBOARD_CACHE_KEY.format(mode=int(approximate))
+
+
+def _store(approximate):
+    entry = {'payload': compute_dashboard(approximate), 'computed_at': time.time()}
+    cache.set(_cache_key(approximate), entry, _max_stale_seconds())
+
+
+def _refresh_in_background(approximate):
+    """Recompute in a daemon thread, unless another worker already is"""
+    lock_args = [DASHBOARD_REFRESH_LOCK_KEY, int(approximate)]
+
+    def refresh():
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_try_advisory_lock(%s, %s)', lock_args)
+                if not cursor.fetchone()[0]:
+                    return
+            try:
+                # Another worker may have refreshed it since it was read
+                entry = cache.get(_cache_key(approximate))
+                if entry is None or time.time() - entry['computed_at'] > _fresh_seconds():
+                    _store(approximate)
+            finally:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT pg_advisory_unlock(%s, %s)', lock_args)
+        except Exception:
+            logger.exception('Admin dashboard refresh failed')
+        finally:
+            connections.close_all()
+
+    threading.Thread(target=refresh, name='dashboard-refresh', daemon=True).start()
+
+
+def _serve(entry):
+    # Live from the presence registry, which is already O(1)
+    payload = dict(entry['payload'], active_sessions=online_count())
+    return payload, max(0, int(time.time() - entry['computed_at']))
+
+
+def _default_mode(approximate):
+    if approximate is None:
+        return getattr(settings, 'DASHBOARD_APPROXIMATE_COUNTS', False)
+    return approximate
+
+
+async def aget_dashboard(approximate=None):
+    """
+    Stale-while-revalidate admin dashboard: served from the cache, and once
+    older than DASHBOARD_FRESH_SECONDS recomputed in the background while
+    the stale copy keeps being served. Only a cold cache computes inline,
+    with acompute_dashboard. Returns (payload, age in seconds).
+    """
+    approximate = _default_mode(approximate)
+    entry = await cache.aget(_cache_key(approximate))
+    if entry is None:
+        entry = {'payload': await acompute_dashboard(approximate), 'computed_at': time.time()}
+        await cache.aset(_cache_key(approximate), entry, _max_stale_seconds())
+    elif time.time() - entry['computed_at'] > _fresh_seconds():
+        await sync_to_async(_refresh_in_background)(approximate)
+    return await sync_to_async(_serve)(entry)
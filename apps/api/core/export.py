@@ -0,0 +1,94 @@
+from operator import itemgetter
+import csv
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+
+from .archive import merge_archived
+
+# Rows fetched per server-side cursor round trip
+EXPORT_CHUNK_SIZE = 2000
+
+TIME_LOG_CSV_HEADER = ['Date', 'Clock In', 'Clock Out', 'Duration (hours)']
+
+
+class Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller"""
+
+    def write(self, value):
+        return value
+
+
+def time_log_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE, archived=None):
+    """
+    Yield CSV rows for a TimeLog queryset, reading plain (clock_in, clock_out)
+    tuples through a server-side cursor instead of model instances. Archived
+    logs (see core.archive) are merged in when given; both they and the
+    queryset must then be ordered newest first.
+    """
+    values = queryset.values_list('id', 'clock_in', 'clock_out').iterator(chunk_size=chunk_size)
+    if archived is not None:
+        archived = ((log.id, log.clock_in, log.clock_out) for log in archived)
+        values = merge_archived(values, archived, key=itemgetter(1), reverse=True)
+    for _, clock_in, clock_out in values:
+        yield format_time_log(clock_in, clock_out)
+
+
+def format_time_log(clock_in, clock_out):
+    """Date, clock in, clock out and duration columns for one time log"""
+    duration = (clock_out - clock_in).total_seconds() / 3600 if clock_out else None
+    return [
+        clock_in.strftime('%Y-%m-%d'),
+        clock_in.strftime('%H:%M:%S'),
+        clock_out.strftime('%H:%M:%S') if clock_out else '',
+        f'{duration:.2f}' if duration else ''
+    ]
+
+
+def stream_csv(header, rows, rows_per_chunk=500):
+    """
+    Encode rows as CSV text chunks for a StreamingHttpResponse. The header is
+    sent on its own so the first byte goes out before the query runs.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+
+    buffer = []
+    for row in rows:
+        buffer.append(writer.writerow(row))
+        if len(buffer) >= rows_per_chunk:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+_DONE = object()
+
+
+async def aiter_in_thread(iterator):
+    """
+    Async iterator over a sync one. Each chunk is produced in the request's
+    sync thread, where the view ran and its database connection (with any
+    server-side cursor) lives.
+    """
+    iterator = iter(iterator)
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (chunk := await next_chunk(iterator, _DONE)) is not _DONE:
+            yield chunk
+    finally:
+        if hasattr(iterator, 'close'):
+            await sync_to_async(iterator.close, thread_sensitive=True)()
+
+
+def streaming_content(request, iterator):
+    """
+    Content for a StreamingHttpResponse that goes out as it is produced.
+    Under ASGI Django reads a sync iterator to the end with
+    sync_to_async(list) before sending anything, so it is wrapped in an
+    async one there.
+    """
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        return aiter_in_thread(iterator)
+    return iterator
@@ -1,13 +1,13 @@
 from django.core.management.base import BaseCommand, CommandError
-from core.models import AllowedIP, User
+from core.models import AllowedIP, User, normalize_ip_network
 from django.core.exceptions import ValidationError
 
 
 class Command(BaseCommand):
-    help = 'Add an IP address to the allowed list for clock app access'
+    help = 'Add an IP address or CIDR network to the allowed list for clock app access'
 
     def add_arguments(self, parser):
-        parser.add_argument('ip_address', type=str, help='IP address to allow')
+        parser.add_argument('ip_address', type=str, help='IP address or CIDR network (e.g. 10.20.0.0/16) to allow')
         parser.add_argument('--label', type=str, help='Optional label for the IP address')
         parser.add_argument('--user', type=str, help='Access code of user adding the IP')
 
@@ -16,11 +16,12 @@ class Command(BaseCommand):
         label = options.get('label', '')
         user_access_code = options.get('user')
 
-        # Validate IP address
+        # Validate and normalize IP address / network
         try:
             AllowedIP(ip_address=ip_address).clean()
         except ValidationError as e:
             raise CommandError(f'Invalid IP address: {e}')
+        ip_address = normalize_ip_network(ip_address)
 
         # Get user if provided
         created_by = None
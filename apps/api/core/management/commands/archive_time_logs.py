@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.archive import ArchiveBusy, archive_time_logs, retention_boundary
+from core.archive_file import ArchiveError
+
+
+class Command(BaseCommand):
+    help = 'Move closed time logs older than the retention period into compressed monthly archive files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months',
+            type=int,
+            default=settings.TIME_LOG_RETENTION_MONTHS,
+            help='Months of history kept in time_logs, counting the current one '
+                 f'(default: {settings.TIME_LOG_RETENTION_MONTHS})'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows deleted from time_logs per transaction (default: 1000)'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.0,
+            help='Seconds to sleep between delete batches (default: 0)'
+        )
+
+    def handle(self, *args, **options):
+        months = options['months']
+        batch_size = options['batch_size']
+
+        if months < 1:
+            raise CommandError('--months must be at least 1')
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        before = retention_boundary(months)
+        try:
+            stats = archive_time_logs(before, batch_size=batch_size, pause=options['pause'])
+        except (ArchiveBusy, ArchiveError) as e:
+            raise CommandError(str(e))
+
+        if not stats.periods:
+            self.stdout.write(f'No closed time logs before {before:%Y-%m-%d} to archive')
+            return
+
+        months_archived = ', '.join(f'{month:%Y-%m}' for month in stats.periods)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Archived {stats.archived} time logs from {months_archived}, deleted '
+                f'{stats.deleted} from time_logs in {stats.batches} batches in {stats.elapsed:.2f}s'
+            )
+        )
+        if stats.kept:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'{stats.kept} logs changed while archiving were kept and will be archived on the next run'
+                )
+            )
\ No newline at end of file
@@ -0,0 +1,67 @@
+from datetime import date
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from core.bulk_export import (
+    ARCHIVE_CHOICES, PARTITION_CHOICES, export_filename, export_org_timesheets
+)
+
+
+class Command(BaseCommand):
+    help = 'Export every member\'s time logs for a date range (gzip CSV or zip per committee)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('start_date', type=str, help='First day, YYYY-MM-DD')
+        parser.add_argument('end_date', type=str, help='Last day (inclusive), YYYY-MM-DD')
+        parser.add_argument(
+            '--by',
+            choices=PARTITION_CHOICES,
+            default='month',
+            help='Split the gzip export by month or by groups of users (default: month)'
+        )
+        parser.add_argument(
+            '--archive',
+            choices=ARCHIVE_CHOICES,
+            default='gzip',
+            help='gzip: one CSV; zip: one CSV per committee (default: gzip)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Worker processes (default: EXPORT_WORKERS setting)'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Output file (default: timesheets_<start>_<end>.csv.gz or .zip)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start_date = date.fromisoformat(options['start_date'])
+            end_date = date.fromisoformat(options['end_date'])
+        except ValueError:
+            raise CommandError('Dates must be in YYYY-MM-DD format')
+        if end_date < start_date:
+            raise CommandError('end_date must not be before start_date')
+
+        archive = options['archive']
+        output = options.get('output') or export_filename(start_date, end_date, archive)
+
+        started = time.monotonic()
+        size = 0
+        with open(output, 'wb') as f:
+            for chunk in export_org_timesheets(
+                start_date, end_date,
+                partition=options['by'],
+                archive=archive,
+                workers=options.get('workers'),
+            ):
+                f.write(chunk)
+                size += len(chunk)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Exported timesheets to {output} ({size} bytes) in {time.monotonic() - started:.2f}s'
+            )
+        )
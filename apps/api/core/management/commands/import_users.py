@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from core.access_codes import AccessCodesExhausted
+from core.user_import import IMPORT_BATCH_SIZE, ImportFormatError, import_users, parse_rows
+
+
+class Command(BaseCommand):
+    help = 'Bulk create users from a CSV (full_name, target_hours_per_week, role) or JSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='CSV or JSON file to import')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help=f'Users inserted per statement (default: {IMPORT_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate the file without creating users'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        content_type = 'json' if path.lower().endswith('.json') else 'csv'
+
+        try:
+            with open(path, 'rb') as f:
+                rows = parse_rows(f.read(), content_type)
+        except OSError as e:
+            raise CommandError(f'Cannot read {path}: {e}')
+        except ImportFormatError as e:
+            raise CommandError(str(e))
+
+        started = time.monotonic()
+        try:
+            result = import_users(rows, batch_size=options['batch_size'], dry_run=options['dry_run'])
+        except AccessCodesExhausted as e:
+            raise CommandError(str(e))
+        elapsed = time.monotonic() - started
+
+        for error in result['errors']:
+            details = '; '.join(f'{field}: {message}' for field, message in error['errors'].items())
+            self.stderr.write(f'Row {error["row"]}: {details}')
+
+        if options['dry_run']:
+            self.stdout.write(
+                f'Dry run: {len(result["created"])} valid rows, {len(result["errors"])} errors'
+            )
+            return
+
+        for user in result['created']:
+            self.stdout.write(f'{user["access_code"]}  {user["full_name"]} ({user["role"]})')
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Imported {len(result["created"])} users in {elapsed:.2f}s '
+                f'({len(result["errors"])} rows skipped)'
+            )
+        )
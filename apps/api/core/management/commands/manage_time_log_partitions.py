@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from core.partitions import (
+    add_months, ensure_month_partitions, month_start, use_brin_for_old_partitions
+)
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming monthly time log partitions and move old ones to BRIN indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=settings.TIME_LOG_PARTITION_MONTHS_AHEAD,
+            help='Months past the current one to create partitions for '
+                 f'(default: {settings.TIME_LOG_PARTITION_MONTHS_AHEAD})'
+        )
+        parser.add_argument(
+            '--btree-months',
+            type=int,
+            default=settings.TIME_LOG_BTREE_MONTHS,
+            help='Recent months that keep a btree clock_in index '
+                 f'(default: {settings.TIME_LOG_BTREE_MONTHS})'
+        )
+
+    def handle(self, *args, **options):
+        months_ahead = options['months_ahead']
+        btree_months = options['btree_months']
+
+        if months_ahead < 0:
+            raise CommandError('--months-ahead cannot be negative')
+        if btree_months < 0:
+            raise CommandError('--btree-months cannot be negative')
+
+        until = add_months(month_start(timezone.now()), months_ahead)
+
+        created = ensure_month_partitions(until=until)
+        converted = use_brin_for_old_partitions(keep_months=btree_months)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Created {len(created)} partitions ({", ".join(created) or "none"}), '
+                f'moved {len(converted)} to BRIN ({", ".join(converted) or "none"})'
+            )
+        )
\ No newline at end of file
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from core.archive import archived_logs
+from core.models import User, WeeklyHours
+from core.stats import REBUILD_WEEKLY_HOURS_SQL, weekly_deltas
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the weekly hours rollup from time log history'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='Access code of a single user to rebuild (default: everyone)'
+        )
+
+    def handle(self, *args, **options):
+        user_access_code = options.get('user')
+
+        user = None
+        if user_access_code:
+            try:
+                user = User.objects.get(access_code=user_access_code)
+            except User.DoesNotExist:
+                raise CommandError(f'User with access code {user_access_code} not found')
+
+        rollups = WeeklyHours.objects.all()
+        user_filter = ''
+        params = []
+        if user:
+            rollups = rollups.filter(user=user)
+            user_filter = 'AND t.user_id = %s'
+            params.append(user.id)
+
+        with transaction.atomic():
+            deleted, _ = rollups.delete()
+            # Archived history first; the SQL adds time_logs on top
+            archived = weekly_deltas(archived_logs([user.id] if user else None))
+            WeeklyHours.objects.bulk_create(
+                [
+                    WeeklyHours(user_id=user_id, week_start=week_start, seconds=seconds)
+                    for (user_id, week_start), seconds in archived.items() if seconds
+                ],
+                batch_size=1000
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(REBUILD_WEEKLY_HOURS_SQL.format(user_filter=user_filter), params)
+            created = rollups.count()
+
+        scope = f'user {user.full_name}' if user else 'all users'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Rebuilt weekly hours for {scope}: removed {deleted} rows, wrote {created} rows'
+            )
+        )
@@ -1,12 +1,12 @@
 from django.core.management.base import BaseCommand, CommandError
-from core.models import AllowedIP
+from core.models import AllowedIP, normalize_ip_network
 
 
 class Command(BaseCommand):
     help = 'Remove an IP address from the allowed list for clock app access'
 
     def add_arguments(self, parser):
-        parser.add_argument('ip_address', type=str, help='IP address to remove')
+        parser.add_argument('ip_address', type=str, help='IP address or CIDR network to remove')
         parser.add_argument(
             '--force',
             action='store_true',
@@ -17,6 +17,11 @@ class Command(BaseCommand):
         ip_address = options['ip_address']
         force = options['force']
 
+        try:
+            ip_address = normalize_ip_network(ip_address)
+        except ValueError:
+            raise CommandError(f'Invalid IP address: {ip_address}')
+
         try:
             allowed_ip = AllowedIP.objects.get(ip_address=ip_address)
         except AllowedIP.DoesNotExist:
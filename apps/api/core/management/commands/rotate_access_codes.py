@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.access_codes import AccessCodesExhausted, delete_auth_users, rotate_access_codes
+from core.models import Committee, User
+
+
+class Command(BaseCommand):
+    help = 'Rotate access codes for all users, one role or one committee in a single transaction'
+
+    def add_arguments(self, parser):
+        scope = parser.add_mutually_exclusive_group()
+        scope.add_argument('--all', action='store_true', help='Rotate every user\'s access code')
+        scope.add_argument(
+            '--role',
+            choices=[role for role, _ in User.ROLE_CHOICES],
+            help='Rotate access codes of users with this role'
+        )
+        scope.add_argument('--committee', type=str, help='Rotate access codes of this committee\'s members (name)')
+        parser.add_argument(
+            '--prune-auth-users',
+            action='store_true',
+            help='Also delete the access-code auth users older logins left behind'
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options.get('role'):
+            users = users.filter(role=options['role'])
+        elif options.get('committee'):
+            try:
+                committee = Committee.objects.get(name=options['committee'])
+            except Committee.DoesNotExist:
+                raise CommandError(f'Committee {options["committee"]} not found')
+            users = users.filter(usercommittee__committee=committee)
+        elif not options['all']:
+            if not options['prune_auth_users']:
+                raise CommandError('Choose --all, --role or --committee (or only --prune-auth-users)')
+            users = None
+
+        if users is not None:
+            try:
+                rotated = rotate_access_codes(users)
+            except AccessCodesExhausted as e:
+                raise CommandError(str(e))
+
+            for user, old_access_code in rotated:
+                self.stdout.write(f'{old_access_code} -> {user.access_code}  {user.full_name}')
+            self.stdout.write(self.style.SUCCESS(f'Rotated {len(rotated)} access codes'))
+
+        if options['prune_auth_users']:
+            deleted = delete_auth_users()
+            self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} stale auth users'))
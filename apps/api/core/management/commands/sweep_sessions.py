@@ -0,0 +1,69 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from core.session_sweep import SweepStats, sweep_expired_sessions
+
+
+class Command(BaseCommand):
+    help = 'Delete expired sessions in small batches and report them per app type'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Sessions deleted per transaction (default: 1000)'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0.0,
+            help='Seconds to sleep between batches (default: 0)'
+        )
+        parser.add_argument(
+            '--every',
+            type=int,
+            help='Keep running and sweep every N seconds instead of once'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pause = options['pause']
+        every = options.get('every')
+
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+        if every is not None and every < 1:
+            raise CommandError('--every must be at least 1 second')
+
+        if every is None:
+            self._report(sweep_expired_sessions(batch_size=batch_size, pause=pause))
+            return
+
+        self.stdout.write(f'Sweeping expired sessions every {every}s (Ctrl+C to stop)')
+        totals = SweepStats()
+        try:
+            while True:
+                stats = sweep_expired_sessions(batch_size=batch_size, pause=pause)
+                totals.merge(stats)
+                if stats.deleted:
+                    self._report(stats)
+                time.sleep(every)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped')
+            self._report(totals)
+
+    def _report(self, stats):
+        if not stats.deleted:
+            self.stdout.write('No expired sessions found')
+            return
+
+        by_app_type = ', '.join(
+            f'{app_type}: {count}' for app_type, count in sorted(stats.by_app_type.items())
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Deleted {stats.deleted} expired sessions in {stats.batches} batches '
+                f'({by_app_type}) in {stats.elapsed:.2f}s, {stats.rate:.0f} sessions/s'
+            )
+        )
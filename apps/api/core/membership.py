@@ -0,0 +1,57 @@
+from django.db import transaction
+
+from .models import User, UserCommittee
+
+
+def existing_user_ids(user_ids):
+    """Return the subset of user_ids that belong to existing users, in one query"""
+    ids = set()
+    for user_id in user_ids or []:
+        try:
+            ids.add(int(user_id))
+        except (TypeError, ValueError):
+            continue
+    if not ids:
+        return set()
+    return set(User.objects.filter(id__in=ids).values_list('id', flat=True))
+
+
+def add_members(committee, user_ids):
+    """Add existing users to a committee, ignoring ones already in it"""
+    ids = existing_user_ids(user_ids)
+    UserCommittee.objects.bulk_create(
+        [UserCommittee(user_id=user_id, committee_id=committee.id) for user_id in ids],
+        ignore_conflicts=True,
+    )
+    return ids
+
+
+def remove_members(committee, user_ids):
+    """Remove users from a committee"""
+    ids = {user_id for user_id in user_ids or [] if str(user_id).isdigit()}
+    deleted, _ = UserCommittee.objects.filter(committee_id=committee.id, user_id__in=ids).delete()
+    return deleted
+
+
+def set_members(committee, user_ids, keep=()):
+    """
+    Make the committee's members exactly `user_ids` (plus `keep`, e.g. the
+    chair) by inserting the missing and deleting the removed memberships.
+    Returns (added, removed) user id sets.
+    """
+    wanted = existing_user_ids(user_ids) | {user_id for user_id in keep if user_id is not None}
+    with transaction.atomic():
+        current = set(
+            UserCommittee.objects.select_for_update()
+            .filter(committee_id=committee.id)
+            .values_list('user_id', flat=True)
+        )
+        removed = current - wanted
+        added = wanted - current
+        if removed:
+            UserCommittee.objects.filter(committee_id=committee.id, user_id__in=removed).delete()
+        UserCommittee.objects.bulk_create(
+            [UserCommittee(user_id=user_id, committee_id=committee.id) for user_id in added],
+            ignore_conflicts=True,
+        )
+    return added, removed
@@ -6,6 +6,7 @@ from django.core.exceptions import PermissionDenied
 from django.middleware.csrf import CsrfViewMiddleware
 from django.views.decorators.csrf import csrf_exempt
 import re
+from .allowlist import is_ip_allowed
 from .models import AllowedIP
 from .session import set_app_type
 
@@ -158,8 +159,13 @@ class IPRestrictionMiddleware(MiddlewareMixin):
         origin = request.META.get('HTTP_ORIGIN', '')
         user_agent = request.META.get('HTTP_USER_AGENT', '')
         app_type_header = request.META.get('HTTP_X_APP_TYPE', '').lower()
-        
-        # First, explicitly check if this is a hub request - if so, no IP restrictions
+
+        # Kiosk endpoints punch without a session, so the allowlist is their
+        # only guard; the client-supplied hub hints below must not skip it
+        if request.path.startswith('/api/clock/'):
+            return True
+
+        # Otherwise, explicitly check if this is a hub request - if so, no IP restrictions
         is_hub = (
             app_type_header == 'hub' or
             'localhost:3001' in origin or 
@@ -203,9 +209,8 @@ class IPRestrictionMiddleware(MiddlewareMixin):
         if ip in ['127.0.0.1', 'localhost', '::1']:
             return True
         
-        # Check database for allowed IPs
-        from .models import AllowedIP
-        return AllowedIP.objects.filter(ip_address=ip).exists()
+        # Check the compiled in-memory allowlist (addresses and CIDR networks)
+        return is_ip_allowed(ip)
 
 
 # SessionConfigMiddleware removed - no longer needed with custom session store
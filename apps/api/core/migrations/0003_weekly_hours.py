@@ -0,0 +1,49 @@
+# Generated by Django 5.2.3
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_seed_initial_data'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeeklyHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week_start', models.DateField(help_text='Monday (UTC) of the ISO week')),
+                ('seconds', models.BigIntegerField(default=0)),
+                ('user', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='weekly_hours',
+                    to='core.user'
+                )),
+            ],
+            options={
+                'db_table': 'weekly_hours',
+                'unique_together': {('user', 'week_start')},
+            },
+        ),
+        # Backfill the rollup from existing closed sessions
+        # (same statement as `manage.py rebuild_weekly_hours`)
+        migrations.RunSQL(
+            """
+            SET LOCAL TIME ZONE 'UTC';
+            INSERT INTO weekly_hours (user_id, week_start, seconds)
+            SELECT t.user_id, w.week::date, SUM(ROUND(EXTRACT(EPOCH FROM
+                       LEAST(t.clock_out, w.week + INTERVAL '7 days') - GREATEST(t.clock_in, w.week)
+                   )))::bigint
+            FROM time_logs t
+            CROSS JOIN LATERAL generate_series(
+                date_trunc('week', t.clock_in), t.clock_out, INTERVAL '1 week'
+            ) AS w(week)
+            WHERE t.clock_out IS NOT NULL AND w.week < t.clock_out
+            GROUP BY t.user_id, w.week;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
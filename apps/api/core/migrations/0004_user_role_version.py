@@ -0,0 +1,21 @@
+# Generated by Django 5.2.3
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_weekly_hours'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='role_version',
+            field=models.PositiveIntegerField(
+                default=1,
+                help_text='Bumped when role or access code changes to invalidate session principals'
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.3
+
+from django.db import migrations, models
+import ipaddress
+
+
+def normalize_ip_addresses(apps, schema_editor):
+    """
+    Casting inet to varchar keeps the prefix length ("10.0.0.5/32"),
+    strip it again for single hosts.
+    """
+    AllowedIP = apps.get_model('core', 'AllowedIP')
+    for allowed_ip in AllowedIP.objects.all():
+        network = ipaddress.ip_network(allowed_ip.ip_address, strict=False)
+        normalized = str(network.network_address) if network.num_addresses == 1 else str(network)
+        if normalized != allowed_ip.ip_address:
+            allowed_ip.ip_address = normalized
+            allowed_ip.save(update_fields=['ip_address'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_user_role_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='allowedip',
+            name='ip_address',
+            field=models.CharField(
+                help_text='IP address or CIDR network (e.g. "10.20.0.0/16") allowed to access the clock app',
+                max_length=43,
+                unique=True
+            ),
+        ),
+        migrations.RunPython(normalize_ip_addresses, migrations.RunPython.noop),
+    ]
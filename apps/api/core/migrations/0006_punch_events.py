@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-17 02:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_allowedip_networks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PunchEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('client_id', models.CharField(help_text='Id generated by the kiosk; replays of the same id are not applied twice', max_length=64, unique=True)),
+                ('action', models.CharField(blank=True, max_length=10)),
+                ('punched_at', models.DateTimeField()),
+                ('status', models.CharField(choices=[('applied', 'Applied'), ('rejected', 'Rejected')], max_length=10)),
+                ('error', models.CharField(blank=True, max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('time_log', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='punch_events', to='core.timelog')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='punch_events', to='core.user')),
+            ],
+            options={
+                'db_table': 'punch_events',
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_punch_events'),
+    ]
+
+    operations = [
+        # Lets "most recent time logs across all users" (admin dashboard)
+        # read the top of an index instead of sorting the whole table
+        migrations.RunSQL(
+            "CREATE INDEX idx_logs_clock_in ON time_logs(clock_in DESC);",
+            reverse_sql="DROP INDEX IF EXISTS idx_logs_clock_in;",
+        ),
+    ]
@@ -0,0 +1,134 @@
+# Generated by Django 5.2.3
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from core import partitions
+
+# Indexes of the unpartitioned table (0001 and 0007), recreated by the reverse
+UNPARTITIONED_INDEXES = [
+    "CREATE INDEX time_logs_user_id_48219f42 ON time_logs(user_id);",
+    "CREATE INDEX idx_logs_user_clock_in ON time_logs(user_id, clock_in DESC);",
+    "CREATE INDEX idx_logs_user_clock_out ON time_logs(user_id, clock_out DESC);",
+    "CREATE UNIQUE INDEX idx_one_open_shift_per_user ON time_logs(user_id) WHERE clock_out IS NULL;",
+    "CREATE INDEX idx_logs_clock_in ON time_logs(clock_in DESC);",
+]
+
+COLUMNS = 'id, clock_in, clock_out, created_at, user_id'
+
+
+def partition_time_logs(apps, schema_editor):
+    """
+    Rebuild time_logs as a partitioned table (see core.partitions) and copy
+    the existing rows over. A partitioned table can't have a primary key or
+    unique index without the partition key, so ids stay unique through the
+    sequence and are indexed per partition, and the one-open-shift index
+    lives on time_logs_open, which holds every open shift.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT pg_get_serial_sequence('time_logs', 'id')")
+        old_sequence, = cursor.fetchone()
+        cursor.execute("ALTER TABLE time_logs RENAME TO time_logs_unpartitioned")
+        cursor.execute(f"ALTER SEQUENCE {old_sequence} RENAME TO time_logs_unpartitioned_id_seq")
+        cursor.execute("SELECT MIN(clock_in) FROM time_logs_unpartitioned WHERE clock_out IS NOT NULL")
+        oldest, = cursor.fetchone()
+
+        cursor.execute("CREATE SEQUENCE time_logs_id_seq")
+        cursor.execute("""
+            CREATE TABLE time_logs (
+                id bigint NOT NULL DEFAULT nextval('time_logs_id_seq'),
+                clock_in timestamp with time zone NOT NULL,
+                clock_out timestamp with time zone NULL,
+                created_at timestamp with time zone NOT NULL,
+                user_id integer NOT NULL
+                    CONSTRAINT time_logs_user_id_48219f42_fk_users_id
+                    REFERENCES users(id) DEFERRABLE INITIALLY DEFERRED
+            ) PARTITION BY LIST ((clock_out IS NULL))
+        """)
+        cursor.execute("ALTER SEQUENCE time_logs_id_seq OWNED BY time_logs.id")
+        cursor.execute(f"CREATE TABLE {partitions.OPEN_PARTITION} PARTITION OF time_logs FOR VALUES IN (true)")
+        cursor.execute(
+            f"CREATE TABLE {partitions.CLOSED_PARTITION} PARTITION OF time_logs "
+            f"FOR VALUES IN (false) PARTITION BY RANGE (clock_in)"
+        )
+        cursor.execute(
+            f"CREATE TABLE {partitions.DEFAULT_PARTITION} PARTITION OF {partitions.CLOSED_PARTITION} DEFAULT"
+        )
+
+    partitions.ensure_month_partitions(since=oldest)
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO time_logs ({COLUMNS}) SELECT {COLUMNS} FROM time_logs_unpartitioned")
+        # Run the deferred user_id checks now; indexes can't be built on
+        # tables with pending trigger events
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(
+            "SELECT setval('time_logs_id_seq', "
+            "COALESCE((SELECT MAX(id) FROM time_logs_unpartitioned), 0) + 1, false)"
+        )
+        cursor.execute("DROP TABLE time_logs_unpartitioned")
+
+        for sql in [
+            "CREATE INDEX time_logs_id_idx ON time_logs(id);",
+            "CREATE INDEX time_logs_user_id_48219f42 ON time_logs(user_id);",
+            "CREATE INDEX idx_logs_user_clock_in ON time_logs(user_id, clock_in DESC);",
+            "CREATE INDEX idx_logs_user_clock_out ON time_logs(user_id, clock_out DESC);",
+            f"CREATE UNIQUE INDEX idx_one_open_shift_per_user ON {partitions.OPEN_PARTITION}(user_id) "
+            f"WHERE clock_out IS NULL;",
+            f"CREATE INDEX {partitions.DEFAULT_PARTITION}_clock_in_idx "
+            f"ON {partitions.DEFAULT_PARTITION}(clock_in DESC);",
+        ]:
+            cursor.execute(sql)
+
+    partitions.use_brin_for_old_partitions()
+
+
+def unpartition_time_logs(apps, schema_editor):
+    """Copy the rows back into a plain table with the pre-0008 indexes"""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("ALTER TABLE time_logs RENAME TO time_logs_partitioned")
+        cursor.execute("""
+            CREATE TABLE time_logs (
+                id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+                clock_in timestamp with time zone NOT NULL,
+                clock_out timestamp with time zone NULL,
+                created_at timestamp with time zone NOT NULL,
+                user_id integer NOT NULL
+                    CONSTRAINT time_logs_user_id_48219f42_fk_users_id
+                    REFERENCES users(id) DEFERRABLE INITIALLY DEFERRED
+            )
+        """)
+        cursor.execute(f"INSERT INTO time_logs ({COLUMNS}) SELECT {COLUMNS} FROM time_logs_partitioned")
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence('time_logs', 'id'), "
+            "COALESCE((SELECT MAX(id) FROM time_logs), 0) + 1, false)"
+        )
+        cursor.execute("DROP TABLE time_logs_partitioned")
+        for sql in UNPARTITIONED_INDEXES:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_time_logs_clock_in_index'),
+    ]
+
+    operations = [
+        # Foreign keys can't reference a partitioned table without a unique
+        # constraint on the referenced column
+        migrations.AlterField(
+            model_name='punchevent',
+            name='time_log',
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name='punch_events',
+                to='core.timelog'
+            ),
+        ),
+        migrations.RunPython(partition_time_logs, unpartition_time_logs),
+    ]
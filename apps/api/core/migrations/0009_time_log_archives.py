@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-17 02:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_partition_time_logs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimeLogArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateTimeField(unique=True)),
+                ('period_end', models.DateTimeField()),
+                ('path', models.CharField(help_text='File name inside TIME_LOG_ARCHIVE_DIR', max_length=255)),
+                ('row_count', models.PositiveIntegerField()),
+                ('user_count', models.PositiveIntegerField()),
+                ('size_bytes', models.PositiveBigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'time_log_archives',
+                'ordering': ['period_start'],
+            },
+        ),
+    ]
@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.db import models
 from django.core.validators import RegexValidator
 from django.utils import timezone
+from django.utils.crypto import salted_hmac
 from django.core.exceptions import ValidationError
 import ipaddress
 import random
@@ -36,11 +38,38 @@ class User(models.Model):
         default=2,
         help_text='Target hours per week for this member'
     )
+    role_version = models.PositiveIntegerField(
+        default=1,
+        help_text='Bumped when role or access code changes to invalidate session principals'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"{self.full_name} ({self.access_code})"
 
+    # Let the core User stand in for a Django auth user in sessions
+    # (see core.auth.AccessCodeBackend)
+    is_authenticated = True
+    is_anonymous = False
+
+    @property
+    def username(self):
+        return self.access_code
+
+    def get_session_auth_hash(self):
+        """Session hash tied to the access code, so rotating it ends old sessions"""
+        return self._get_session_auth_hash()
+
+    def get_session_auth_fallback_hash(self):
+        for fallback_secret in settings.SECRET_KEY_FALLBACKS:
+            yield self._get_session_auth_hash(secret=fallback_secret)
+
+    def _get_session_auth_hash(self, secret=None):
+        return salted_hmac(
+            'core.models.User.get_session_auth_hash', self.access_code,
+            secret=secret, algorithm='sha256'
+        ).hexdigest()
+
     def save(self, *args, **kwargs):
         # Generate access code if not provided
         if not self.access_code:
@@ -88,12 +117,25 @@ class UserCommittee(models.Model):
         unique_together = ('user', 'committee')
 
 
+def normalize_ip_network(value):
+    """
+    Normalize an IP address or CIDR network to its canonical string form.
+    Single hosts are stored without a prefix length (e.g. "10.0.0.5"),
+    networks as "10.0.0.0/24". Raises ValueError if invalid.
+    """
+    network = ipaddress.ip_network(str(value).strip(), strict=False)
+    if network.num_addresses == 1:
+        return str(network.network_address)
+    return str(network)
+
+
 class AllowedIP(models.Model):
-    """IP addresses allowed to access the clock app"""
+    """IP addresses or CIDR networks allowed to access the clock app"""
     id = models.AutoField(primary_key=True)
-    ip_address = models.GenericIPAddressField(
+    ip_address = models.CharField(
+        max_length=43,
         unique=True,
-        help_text='IP address allowed to access the clock app'
+        help_text='IP address or CIDR network (e.g. "10.20.0.0/16") allowed to access the clock app'
     )
     label = models.CharField(
         max_length=100,
@@ -112,9 +154,9 @@ class AllowedIP(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def clean(self):
-        """Validate IP address format"""
+        """Validate and normalize IP address or network format"""
         try:
-            ipaddress.ip_address(self.ip_address)
+            self.ip_address = normalize_ip_network(self.ip_address)
         except ValueError:
             raise ValidationError('Invalid IP address format')
 
@@ -132,7 +174,11 @@ class AllowedIP(models.Model):
 
 
 class TimeLog(models.Model):
-    """Tracks clock in/out per user"""
+    """
+    Tracks clock in/out per user. The table is partitioned by migration 0008
+    (open shifts, then closed shifts by clock_in month, see core.partitions),
+    so filter on clock_in ranges to let Postgres prune partitions.
+    """
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='time_logs')
     clock_in = models.DateTimeField()
     clock_out = models.DateTimeField(null=True, blank=True)
@@ -155,4 +201,74 @@ class TimeLog(models.Model):
     @property
     def is_active(self):
         """Check if user is currently clocked in"""
-        return self.clock_out is None 
\ No newline at end of file
+        return self.clock_out is None
+
+
+class PunchEvent(models.Model):
+    """A kiosk punch applied through offline sync, keyed by its client id"""
+    STATUS_CHOICES = [
+        ('applied', 'Applied'),
+        ('rejected', 'Rejected'),
+    ]
+
+    client_id = models.CharField(
+        max_length=64,
+        unique=True,
+        help_text='Id generated by the kiosk; replays of the same id are not applied twice'
+    )
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='punch_events')
+    time_log = models.ForeignKey(
+        TimeLog,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_constraint=False,  # time_logs is partitioned, see core.partitions
+        related_name='punch_events'
+    )
+    action = models.CharField(max_length=10, blank=True)
+    punched_at = models.DateTimeField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    error = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'punch_events'
+
+    def __str__(self):
+        return f"{self.client_id} - {self.status}"
+
+
+class TimeLogArchive(models.Model):
+    """
+    A month of closed time logs moved out of time_logs into a compressed
+    archive file by the archive_time_logs command (see core.archive)
+    """
+    period_start = models.DateTimeField(unique=True)
+    period_end = models.DateTimeField()
+    path = models.CharField(max_length=255, help_text='File name inside TIME_LOG_ARCHIVE_DIR')
+    row_count = models.PositiveIntegerField()
+    user_count = models.PositiveIntegerField()
+    size_bytes = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'time_log_archives'
+        ordering = ['period_start']
+
+    def __str__(self):
+        return f"{self.period_start:%Y-%m} ({self.row_count} logs)"
+
+
+class WeeklyHours(models.Model):
+    """Pre-summed closed session time per user per ISO week"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='weekly_hours')
+    week_start = models.DateField(help_text='Monday (UTC) of the ISO week')
+    seconds = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'weekly_hours'
+        unique_together = ('user', 'week_start')
+
+    def __str__(self):
+        return f"{self.user_id} - {self.week_start}: {self.seconds}s" 
\ No newline at end of file
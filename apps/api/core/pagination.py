@@ -0,0 +1,215 @@
+from base64 import b64decode, b64encode
+import binascii
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .archive import as_time_log, user_archived_logs
+from .models import User
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_TICK = timedelta(microseconds=1)
+
+
+def _clip(start, end, lower=None, upper=None):
+    """Narrow [start, end) to [lower, upper), where None is unbounded"""
+    if lower is not None and (start is None or lower > start):
+        start = lower
+    if upper is not None and (end is None or upper < end):
+        end = upper
+    return start, end
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination over time logs ordered by (clock_in DESC, id DESC).
+    Each page seeks from the last row of the previous one instead of using
+    OFFSET, and no COUNT(*) is run, so every page costs the same and is served
+    by the (user_id, clock_in DESC) index. Cursors are opaque.
+
+    Optional start_date / end_date (YYYY-MM-DD, inclusive) bound the scan.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_page_size(self, request):
+        page_size = getattr(settings, 'REST_FRAMEWORK', {}).get('PAGE_SIZE') or 20
+        try:
+            requested = int(request.query_params.get(self.page_size_query_param, page_size))
+        except ValueError:
+            return page_size
+        return max(1, min(requested, self.max_page_size))
+
+    def encode_cursor(self, clock_in, pk, reverse=False):
+        micros = (clock_in - _EPOCH) // timedelta(microseconds=1)
+        token = f'{micros}:{pk}:{int(reverse)}'.encode('ascii')
+        return b64encode(token).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            micros, pk, reverse = b64decode(encoded.encode('ascii')).decode('ascii').split(':')
+            clock_in = _EPOCH + timedelta(microseconds=int(micros))
+            return clock_in, int(pk), reverse == '1'
+        except (TypeError, ValueError, UnicodeError, OverflowError, binascii.Error):
+            raise NotFound('Invalid cursor')
+
+    def get_date_range(self, request):
+        """The optional inclusive start_date / end_date bounds as a [start, end) range"""
+        tz = timezone.get_current_timezone()
+        start = end = None
+        try:
+            start_date = request.query_params.get('start_date')
+            end_date = request.query_params.get('end_date')
+            if start_date:
+                start = datetime.combine(date.fromisoformat(start_date), time.min)
+                start = timezone.make_aware(start, tz)
+            if end_date:
+                end = datetime.combine(date.fromisoformat(end_date) + timedelta(days=1), time.min)
+                end = timezone.make_aware(end, tz)
+        except ValueError:
+            raise ValidationError({'error': 'start_date and end_date must be YYYY-MM-DD'})
+        return start, end
+
+    def filter_date_range(self, queryset, request):
+        """Apply the optional inclusive start_date / end_date bounds"""
+        start, end = self.get_date_range(request)
+        if start is not None:
+            queryset = queryset.filter(clock_in__gte=start)
+        if end is not None:
+            queryset = queryset.filter(clock_in__lt=end)
+        return queryset
+
+    def merge_archived(self, rows, user_id, start, end, cursor, reverse):
+        """
+        Merge the user's archived logs (see core.archive) into a page of rows,
+        keeping the first page_size + 1 in page order. The archive is only
+        read back to the last row of a full page, which for recent pages
+        means not at all.
+        """
+        full = len(rows) > self.page_size
+        if reverse:
+            start, end = _clip(
+                start, end,
+                lower=cursor[0] if cursor else None,
+                upper=rows[-1].clock_in + _TICK if full else None,
+            )
+        else:
+            start, end = _clip(
+                start, end,
+                lower=rows[-1].clock_in if full else None,
+                upper=cursor[0] + _TICK if cursor else None,
+            )
+
+        def key(time_log):
+            return time_log.clock_in, time_log.pk
+
+        archived = (
+            as_time_log(log)
+            for log in user_archived_logs(user_id, start, end, descending=not reverse)
+        )
+        if cursor is not None:
+            position = cursor[:2]
+            archived = (
+                time_log for time_log in archived
+                if (key(time_log) > position if reverse else key(time_log) < position)
+            )
+        archived = list(islice(archived, self.page_size + 1))
+        if not archived:
+            return rows
+
+        user = rows[0].user if rows else User.objects.get(pk=user_id)
+        for time_log in archived:
+            time_log.user = user
+
+        # A log still in time_logs wins over its archived copy
+        merged = {time_log.pk: time_log for time_log in archived}
+        merged.update((time_log.pk, time_log) for time_log in rows)
+        return sorted(merged.values(), key=key, reverse=not reverse)[:self.page_size + 1]
+
+    def paginate_queryset(self, queryset, request, view=None, archived_user_id=None):
+        """
+        Return one page of the queryset. With `archived_user_id`, that user's
+        archived logs are paged through as well, as unsaved TimeLogs.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        start, end = self.get_date_range(request)
+        queryset = self.filter_date_range(queryset, request)
+
+        reverse = cursor is not None and cursor[2]
+        if cursor is not None:
+            clock_in, pk, _ = cursor
+            # The plain clock_in bound is what the index scan seeks on; the OR
+            # only breaks ties between logs with the same clock_in
+            if reverse:
+                queryset = queryset.filter(clock_in__gte=clock_in).filter(
+                    Q(clock_in__gt=clock_in) | Q(id__gt=pk)
+                )
+            else:
+                queryset = queryset.filter(clock_in__lte=clock_in).filter(
+                    Q(clock_in__lt=clock_in) | Q(id__lt=pk)
+                )
+
+        ordering = ('clock_in', 'id') if reverse else ('-clock_in', '-id')
+        rows = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        if archived_user_id is not None:
+            rows = self.merge_archived(rows, archived_user_id, start, end, cursor, reverse)
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Going forward, a previous page exists if we came from a cursor;
+        # going backward, a next page always exists (the one we came from)
+        has_next = has_more if not reverse else True
+        has_previous = cursor is not None if not reverse else has_more
+
+        self.next_cursor = (
+            self.encode_cursor(rows[-1].clock_in, rows[-1].pk) if rows and has_next else None
+        )
+        self.previous_cursor = (
+            self.encode_cursor(rows[0].clock_in, rows[0].pk, reverse=True) if rows and has_previous else None
+        )
+        return rows
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        return self._link(self.next_cursor)
+
+    def get_previous_link(self):
+        return self._link(self.previous_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,121 @@
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.db import connection, transaction
+import re
+
+# time_logs is list-partitioned on (clock_out IS NULL): every open shift is
+# in time_logs_open, where idx_one_open_shift_per_user still sees them all.
+# Closed shifts are range-partitioned by clock_in month below time_logs_closed,
+# with a default partition for anything outside the monthly ranges.
+OPEN_PARTITION = 'time_logs_open'
+CLOSED_PARTITION = 'time_logs_closed'
+DEFAULT_PARTITION = 'time_logs_closed_default'
+
+_MONTH_PARTITION_RE = re.compile(r'^time_logs_y(\d{4})m(\d{2})$')
+
+
+def month_start(moment):
+    """First instant (UTC) of the month containing `moment`"""
+    moment = moment.astimezone(dt_timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def month_partition_name(month):
+    return f'time_logs_y{month.year:04d}m{month.month:02d}'
+
+
+def month_partitions():
+    """{month start: partition name} for the monthly partitions that exist"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = %s::regclass',
+            [CLOSED_PARTITION]
+        )
+        names = [name for name, in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        match = _MONTH_PARTITION_RE.match(name)
+        if match:
+            partitions[datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc)] = name
+    return partitions
+
+
+def create_month_partition(month):
+    """
+    Create the partition for one month. Rows for that month already sitting
+    in the default partition are moved into the new table before it is
+    attached, which attaching requires.
+    """
+    name = month_partition_name(month)
+    start, end = month, add_months(month, 1)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE {name} (LIKE {CLOSED_PARTITION} INCLUDING DEFAULTS)')
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {DEFAULT_PARTITION} '
+            f'WHERE clock_in >= %s AND clock_in < %s RETURNING *) '
+            f'INSERT INTO {name} SELECT * FROM moved',
+            [start, end]
+        )
+        cursor.execute(
+            f'ALTER TABLE {CLOSED_PARTITION} ATTACH PARTITION {name} '
+            f'FOR VALUES FROM (%s) TO (%s)',
+            [start, end]
+        )
+        cursor.execute(f'CREATE INDEX {name}_clock_in_idx ON {name} (clock_in DESC)')
+    return name
+
+
+def ensure_month_partitions(until=None, since=None):
+    """
+    Create any missing monthly partitions from `since` (default: the current
+    month) through `until` (default: TIME_LOG_PARTITION_MONTHS_AHEAD months
+    ahead). Returns the names created.
+    """
+    now = datetime.now(dt_timezone.utc)
+    if until is None:
+        until = add_months(month_start(now), getattr(settings, 'TIME_LOG_PARTITION_MONTHS_AHEAD', 3))
+    month = month_start(since or now)
+    until = month_start(until)
+
+    existing = month_partitions()
+    created = []
+    while month <= until:
+        if month not in existing:
+            created.append(create_month_partition(month))
+        month = add_months(month, 1)
+    return created
+
+
+def use_brin_for_old_partitions(keep_months=None):
+    """
+    Swap the btree clock_in index of monthly partitions older than
+    `keep_months` (default TIME_LOG_BTREE_MONTHS) for a BRIN index. Closed
+    history is appended in clock_in order, so a BRIN index of a few pages
+    prunes range scans about as well at a fraction of the size.
+    Returns the partitions converted.
+    """
+    if keep_months is None:
+        keep_months = getattr(settings, 'TIME_LOG_BTREE_MONTHS', 3)
+    cutoff = add_months(month_start(datetime.now(dt_timezone.utc)), -keep_months)
+
+    converted = []
+    for month, name in sorted(month_partitions().items()):
+        if month >= cutoff:
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT to_regclass(%s)', [f'{name}_clock_in_idx'])
+            if cursor.fetchone()[0] is None:
+                continue
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {name}_clock_in_brin ON {name} USING brin (clock_in)'
+            )
+            cursor.execute(f'DROP INDEX {name}_clock_in_idx')
+        converted.append(name)
+    return converted
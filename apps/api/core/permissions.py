@@ -1,5 +1,11 @@
 from rest_framework import permissions
-from .models import User
+
+
+def _get_role(request):
+    """Role of the session principal, or None if not authenticated"""
+    if not request.user or not request.user.is_authenticated:
+        return None
+    return getattr(request.user, 'role', None)
 
 
 class IsMember(permissions.BasePermission):
@@ -8,14 +14,7 @@ class IsMember(permissions.BasePermission):
     """
     
     def has_permission(self, request, view):
-        if not request.user or not request.user.is_authenticated:
-            return False
-        
-        try:
-            custom_user = User.objects.get(access_code=request.user.username)
-            return custom_user.role in ['member', 'chair', 'admin']
-        except User.DoesNotExist:
-            return False
+        return _get_role(request) in ['member', 'chair', 'admin']
 
 
 class IsChair(permissions.BasePermission):
@@ -24,14 +23,7 @@ class IsChair(permissions.BasePermission):
     """
     
     def has_permission(self, request, view):
-        if not request.user or not request.user.is_authenticated:
-            return False
-        
-        try:
-            custom_user = User.objects.get(access_code=request.user.username)
-            return custom_user.role in ['chair', 'admin']
-        except User.DoesNotExist:
-            return False
+        return _get_role(request) in ['chair', 'admin']
 
 
 class IsAdmin(permissions.BasePermission):
@@ -40,14 +32,7 @@ class IsAdmin(permissions.BasePermission):
     """
     
     def has_permission(self, request, view):
-        if not request.user or not request.user.is_authenticated:
-            return False
-        
-        try:
-            custom_user = User.objects.get(access_code=request.user.username)
-            return custom_user.role == 'admin'
-        except User.DoesNotExist:
-            return False
+        return _get_role(request) == 'admin'
 
 
 class IsOwnerOrChair(permissions.BasePermission):
@@ -56,35 +41,24 @@ class IsOwnerOrChair(permissions.BasePermission):
     """
     
     def has_permission(self, request, view):
-        if not request.user or not request.user.is_authenticated:
-            return False
-        
-        try:
-            custom_user = User.objects.get(access_code=request.user.username)
-            return custom_user.role in ['member', 'chair', 'admin']
-        except User.DoesNotExist:
-            return False
+        return _get_role(request) in ['member', 'chair', 'admin']
     
     def has_object_permission(self, request, view, obj):
-        if not request.user or not request.user.is_authenticated:
+        role = _get_role(request)
+        if role is None:
             return False
         
-        try:
-            custom_user = User.objects.get(access_code=request.user.username)
-            
-            # Admins and chairs can access any object
-            if custom_user.role in ['chair', 'admin']:
-                return True
-            
-            # Members can only access their own objects
-            if hasattr(obj, 'user_id'):
-                return obj.user_id == custom_user.id
-            elif hasattr(obj, 'user'):
-                return obj.user.id == custom_user.id
-            
-            return False
-        except User.DoesNotExist:
-            return False
+        # Admins and chairs can access any object
+        if role in ['chair', 'admin']:
+            return True
+        
+        # Members can only access their own objects
+        if hasattr(obj, 'user_id'):
+            return obj.user_id == request.user.id
+        elif hasattr(obj, 'user'):
+            return obj.user.id == request.user.id
+        
+        return False
 
 
 class IsTeamMemberOrChair(permissions.BasePermission):
@@ -93,11 +67,4 @@ class IsTeamMemberOrChair(permissions.BasePermission):
     """
     
     def has_permission(self, request, view):
-        if not request.user or not request.user.is_authenticated:
-            return False
-        
-        try:
-            custom_user = User.objects.get(access_code=request.user.username)
-            return custom_user.role in ['member', 'chair', 'admin']
-        except User.DoesNotExist:
-            return False 
\ No newline at end of file
+        return _get_role(request) in ['member', 'chair', 'admin']
\ No newline at end of file
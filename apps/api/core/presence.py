@@ -0,0 +1,273 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+
+from .models import Committee, TimeLog, User
+from .presence_registry import apply_events
+
+logger = logging.getLogger(__name__)
+
+# Postgres NOTIFY channel PostgresPresenceBroker relays events on
+PRESENCE_CHANNEL = 'presence'
+
+# Events a stream may fall behind by before it is closed; the client
+# reconnects and starts again from a fresh snapshot
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+def clock_event(time_log):
+    """Presence event for a time log that was just opened or closed"""
+    return {
+        'type': 'clock_out' if time_log.clock_out else 'clock_in',
+        'user_id': time_log.user_id,
+        'time_log_id': time_log.id,
+        'clock_in': time_log.clock_in.isoformat(),
+        'clock_out': time_log.clock_out.isoformat() if time_log.clock_out else None,
+    }
+
+
+class Subscription:
+    """A stream's queue of events, living on the stream's event loop"""
+
+    def __init__(self, user_ids=None):
+        self.user_ids = user_ids
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def wants(self, event):
+        return self.user_ids is None or event['user_id'] in self.user_ids
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class LocalPresenceBroker:
+    """
+    In-process fanout: publish hands the event to every stream open in this
+    worker. Enough for a single worker process; with several, use
+    PostgresPresenceBroker so punches handled by one reach streams on all.
+    """
+
+    def __init__(self):
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_ids=None):
+        subscription = Subscription(user_ids)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event):
+        self.deliver(event)
+
+    def deliver(self, event):
+        """Queue an event on every interested local stream (thread-safe)"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if not subscription.wants(event):
+                continue
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # The stream's event loop is gone
+                self.unsubscribe(subscription)
+
+
+class PostgresPresenceBroker(LocalPresenceBroker):
+    """
+    Fanout across worker processes through Postgres LISTEN/NOTIFY: publish
+    sends a NOTIFY, and one listener thread per process delivers every
+    notification to that process's streams.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._listener = None
+
+    def subscribe(self, user_ids=None):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(
+                    target=self._listen, name='presence-listener', daemon=True
+                )
+                self._listener.start()
+        return super().subscribe(user_ids)
+
+    def publish(self, event):
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [PRESENCE_CHANNEL, json.dumps(event)])
+
+    def _listen(self):
+        while True:
+            try:
+                self._listen_once()
+            except Exception:
+                logger.exception('Presence listener lost its connection, reconnecting')
+                time.sleep(1)
+
+    def _listen_once(self):
+        # A dedicated connection outside Django's per-thread handling, since
+        # it stays in LISTEN for the life of the process
+        wrapper = connections['default']
+        conn = wrapper.get_new_connection(wrapper.get_connection_params())
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f'LISTEN {PRESENCE_CHANNEL}')
+            while True:
+                if select.select([conn], [], [], 30) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    self.deliver(json.loads(notify.payload))
+        finally:
+            conn.close()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """The process-wide broker configured by PRESENCE_BROKER"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.PRESENCE_BROKER)()
+    return _broker
+
+
+def _publish(events):
+    try:
+        apply_events(events)
+    except Exception:
+        logger.exception('Could not update the presence registry')
+
+    broker = get_broker()
+    for event in events:
+        try:
+            broker.publish(event)
+        except Exception:
+            # Presence is best effort; it must never fail a punch
+            logger.exception('Could not publish presence event')
+
+
+def publish_clock_events(time_logs):
+    """
+    Publish presence events for opened or closed time logs, and fold them
+    into the presence registry, once the transaction commits
+    """
+    events = [clock_event(time_log) for time_log in time_logs]
+    if events:
+        transaction.on_commit(lambda: _publish(events))
+
+
+def presence_scope(principal, committee_id=None):
+    """
+    Return {user_id: full_name} for the users whose presence the principal
+    may follow, or None for everyone. Admins see everyone (or one
+    committee), chairs the members of the committees they chair, and
+    members only themselves.
+    """
+    if principal.role == 'member':
+        return {principal.id: principal.full_name}
+
+    committees = Committee.objects.all()
+    if principal.role == 'chair':
+        committees = committees.filter(chair_id=principal.id)
+    elif not committee_id:
+        return None
+
+    if committee_id:
+        committees = committees.filter(id=committee_id)
+        if not committees.exists():
+            raise PermissionDenied('Committee not found or access denied')
+
+    scope = dict(
+        User.objects
+        .filter(usercommittee__committee__in=committees)
+        .values_list('id', 'full_name')
+        .distinct()
+    )
+    scope[principal.id] = principal.full_name
+    return scope
+
+
+def online_snapshot(user_ids=None):
+    """Everyone currently clocked in (within user_ids, if given)"""
+    open_logs = TimeLog.objects.filter(clock_out__isnull=True).order_by()
+    if user_ids is not None:
+        open_logs = open_logs.filter(user_id__in=list(user_ids))
+    return [
+        {
+            'user_id': user_id,
+            'full_name': full_name,
+            'time_log_id': time_log_id,
+            'clock_in': clock_in.isoformat(),
+        }
+        for time_log_id, user_id, full_name, clock_in in open_logs.values_list(
+            'id', 'user_id', 'user__full_name', 'clock_in'
+        )
+    ]
+
+
+def _user_names(user_ids):
+    return dict(User.objects.filter(id__in=user_ids).values_list('id', 'full_name'))
+
+
+def _sse(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+async def stream_presence(scope, heartbeat=None):
+    """
+    Async iterator of Server-Sent Events for a presence stream: a snapshot
+    of who is clocked in, then one event per clock-in or clock-out, with
+    comment lines as keep-alives while nothing happens.
+    """
+    if heartbeat is None:
+        heartbeat = settings.PRESENCE_HEARTBEAT
+    names = dict(scope or {})
+
+    broker = get_broker()
+    # Subscribe before taking the snapshot so nothing in between is missed
+    subscription = broker.subscribe(None if scope is None else set(scope))
+    try:
+        snapshot = await sync_to_async(online_snapshot)(None if scope is None else list(scope))
+        for entry in snapshot:
+            names[entry['user_id']] = entry['full_name']
+        yield 'retry: 3000\n' + _sse('snapshot', {'online': snapshot})
+
+        while not subscription.overflowed:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+
+            if event['user_id'] not in names:
+                names.update(await sync_to_async(_user_names)([event['user_id']]))
+            yield _sse(event['type'], dict(event, full_name=names.get(event['user_id'])))
+    finally:
+        broker.unsubscribe(subscription)
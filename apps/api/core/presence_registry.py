@@ -0,0 +1,140 @@
+from datetime import datetime
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.utils.connection import ConnectionProxy
+import time
+
+from .models import TimeLog
+
+# The registry lives in the cache every worker process shares, so a punch
+# committed by one worker is seen by all of them
+cache = ConnectionProxy(caches, 'shared')
+
+# Cache key holding the registry shared between workers
+REGISTRY_KEY = 'presence_registry'
+
+# Postgres advisory lock used as a mutex around changes to the registry; a
+# cache.add() mutex isn't atomic across processes in the file-based cache
+REGISTRY_LOCK_KEY = 0x50524553
+
+# How long (seconds) a writer waits for the mutex before giving up and
+# dropping the registry, so the next read rebuilds it instead
+_LOCK_WAIT = 1.0
+
+
+def _cache_timeout():
+    return getattr(settings, 'PRESENCE_REGISTRY_TIMEOUT', 300)
+
+
+class PresenceRegistry:
+    """Who is clocked in: user id -> clock-in time"""
+
+    def __init__(self, online):
+        self.online = dict(online)
+
+    def add(self, user_id, clock_in):
+        self.online[user_id] = clock_in
+
+    def remove(self, user_id):
+        self.online.pop(user_id, None)
+
+
+def _load():
+    """Read the registry from the open-shift index (one row per clocked-in user)"""
+    return PresenceRegistry(
+        TimeLog.objects.filter(clock_out__isnull=True).order_by().values_list('user_id', 'clock_in')
+    )
+
+
+def _acquire():
+    deadline = time.monotonic() + _LOCK_WAIT
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute('SELECT pg_try_advisory_lock(%s)', [REGISTRY_LOCK_KEY])
+            if cursor.fetchone()[0]:
+                return True
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+
+
+def _release():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_unlock(%s)', [REGISTRY_LOCK_KEY])
+
+
+def get_registry():
+    """
+    Return the shared registry, rebuilding it from the database when the
+    cache has none (first use after startup, eviction or expiry).
+    """
+    registry = cache.get(REGISTRY_KEY)
+    if registry is not None:
+        return registry
+
+    locked = _acquire()
+    try:
+        registry = cache.get(REGISTRY_KEY) if locked else None
+        if registry is None:
+            registry = _load()
+            if locked:
+                cache.set(REGISTRY_KEY, registry, _cache_timeout())
+        return registry
+    finally:
+        if locked:
+            _release()
+
+
+def apply_events(events):
+    """
+    Fold committed clock events (see presence.clock_event) into the shared
+    registry. Applying an event twice is harmless. If there is no registry
+    yet there is nothing to do: the next read builds it from the database.
+    """
+    if not _acquire():
+        cache.delete(REGISTRY_KEY)
+        return
+    try:
+        registry = cache.get(REGISTRY_KEY)
+        if registry is None:
+            return
+        for event in events:
+            if event['type'] == 'clock_in':
+                registry.add(event['user_id'], datetime.fromisoformat(event['clock_in']))
+            else:
+                registry.remove(event['user_id'])
+        cache.set(REGISTRY_KEY, registry, _cache_timeout())
+    finally:
+        _release()
+
+
+def invalidate_registry():
+    """
+    Drop the shared registry once the current transaction commits, after
+    changes clock events don't describe (edited or deleted logs or users).
+    The next read rebuilds it.
+    """
+    transaction.on_commit(_drop)
+
+
+def _drop():
+    # Under the mutex, so an update in progress can't write the old one back
+    locked = _acquire()
+    try:
+        cache.delete(REGISTRY_KEY)
+    finally:
+        if locked:
+            _release()
+
+
+def online_count():
+    return len(get_registry().online)
+
+
+def online_users(user_ids=None):
+    """{user_id: clock_in} for everyone clocked in, or only those in user_ids"""
+    online = get_registry().online
+    if user_ids is None:
+        return dict(online)
+    return {user_id: online[user_id] for user_id in user_ids if user_id in online}
@@ -0,0 +1,167 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from django.utils.connection import ConnectionProxy
+from rest_framework.authentication import SessionAuthentication
+
+from .models import User
+
+# Role versions are cached where every worker process sees them, so an
+# invalidation on one worker reaches all of them
+cache = ConnectionProxy(caches, 'shared')
+
+# Session key holding the principal snapshot taken at login
+PRINCIPAL_SESSION_KEY = '_principal'
+
+
+class Principal:
+    """
+    Request-scoped snapshot of the core User stored in the session at login.
+    Quacks enough like a Django user (is_authenticated, username) for DRF and
+    the existing views, without touching the database.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, id, access_code, full_name, role, version):
+        self.id = id
+        self.access_code = access_code
+        self.full_name = full_name
+        self.role = role
+        self.version = version
+
+    def __str__(self):
+        return f"{self.full_name} ({self.access_code})"
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def username(self):
+        """Access code, matching User.username"""
+        return self.access_code
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.access_code, user.full_name, user.role, user.role_version)
+
+    @classmethod
+    def from_session(cls, data):
+        try:
+            return cls(data['id'], data['access_code'], data['full_name'], data['role'], data['version'])
+        except (KeyError, TypeError):
+            return None
+
+    def to_session(self):
+        return {
+            'id': self.id,
+            'access_code': self.access_code,
+            'full_name': self.full_name,
+            'role': self.role,
+            'version': self.version,
+        }
+
+
+def _version_cache_key(user_id):
+    return f'principal_version:{user_id}'
+
+
+def _cache_timeout():
+    return getattr(settings, 'PRINCIPAL_VERSION_CACHE_TIMEOUT', 60)
+
+
+def _current_version(user_id):
+    """Role version for a user, from the cache when possible"""
+    key = _version_cache_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = User.objects.filter(pk=user_id).values_list('role_version', flat=True).first()
+        if version is None:
+            return None
+        cache.set(key, version, _cache_timeout())
+    return version
+
+
+def store_principal(request, user):
+    """Snapshot the core user into the session (call after django.contrib.auth.login)"""
+    principal = Principal.from_user(user)
+    request.session[PRINCIPAL_SESSION_KEY] = principal.to_session()
+    cache.set(_version_cache_key(user.id), user.role_version, _cache_timeout())
+    return principal
+
+
+def get_principal(request):
+    """
+    Return the Principal for this request, or None if the session has none or
+    the user it points at is gone or was re-keyed since login.
+    """
+    if hasattr(request, '_cached_principal'):
+        return request._cached_principal
+
+    principal = None
+    session = getattr(request, 'session', None)
+    if session is not None:
+        data = session.get(PRINCIPAL_SESSION_KEY)
+        if data is not None:
+            principal = _validate(request, Principal.from_session(data))
+        elif '_auth_user_id' in session:
+            # Logged in without a principal snapshot: build one from the
+            # session user (AccessCodeBackend loads the core User)
+            user = getattr(request, 'user', None)
+            if isinstance(user, User):
+                principal = store_principal(request, user)
+
+    request._cached_principal = principal
+    return principal
+
+
+def _validate(request, principal):
+    """Check the snapshot against the role version and refresh it if stale"""
+    if principal is None:
+        return None
+
+    version = _current_version(principal.id)
+    if version == principal.version:
+        return principal
+
+    # Role, access code or existence changed since the snapshot was taken
+    user = User.objects.filter(pk=principal.id).first()
+    if user is None or user.access_code != principal.access_code:
+        request.session.pop(PRINCIPAL_SESSION_KEY, None)
+        return None
+    return store_principal(request, user)
+
+
+def invalidate_principal(user):
+    """
+    Bump a user's role version so existing session snapshots are re-checked.
+    Call after changing role or access code, or before deleting the user.
+    """
+    User.objects.filter(pk=user.pk).update(role_version=F('role_version') + 1)
+    cache.delete(_version_cache_key(user.pk))
+
+
+def invalidate_principals(user_ids):
+    """Bulk version of invalidate_principal for many users at once"""
+    user_ids = list(user_ids)
+    User.objects.filter(pk__in=user_ids).update(role_version=F('role_version') + 1)
+    # Drop cached versions only once the new ones are visible to other requests
+    keys = [_version_cache_key(user_id) for user_id in user_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+class PrincipalAuthentication(SessionAuthentication):
+    """
+    DRF authentication that uses the session principal as request.user,
+    so permissions and views share it instead of querying User each time.
+    """
+
+    def authenticate(self, request):
+        principal = get_principal(request._request)
+        if principal is None:
+            return None
+
+        self.enforce_csrf(request)
+        return (principal, None)
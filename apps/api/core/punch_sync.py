@@ -0,0 +1,228 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import PunchEvent, TimeLog, User
+from .presence import publish_clock_events
+from .serializers import PunchEventSerializer
+from .stats import record_sessions
+
+PUNCH_SYNC_MAX_EVENTS = 1000
+
+# How far ahead of the server clock a kiosk timestamp may be
+PUNCH_SYNC_MAX_SKEW = timedelta(minutes=5)
+
+
+class PunchSyncConflict(Exception):
+    """A live punch changed the clock state of a user while the batch was applied"""
+
+
+def _result(event_id, status, action=None, time_log_id=None, error=None):
+    result = {'id': event_id, 'status': status, 'action': action, 'time_log_id': time_log_id}
+    if error:
+        result['error'] = error
+    return result
+
+
+def _stored_result(punch_event):
+    return _result(
+        punch_event.client_id,
+        'duplicate',
+        punch_event.action or None,
+        punch_event.time_log_id,
+        punch_event.error or None,
+    )
+
+
+def _replay(events, open_log, last_event_at):
+    """
+    Apply one user's events, sorted by timestamp, to their clock state.
+    Yields (index, event, action, time_log, error) with time_log None for
+    rejected events; the TimeLogs are modified (or created unsaved) in place.
+    """
+    for index, event in events:
+        punched_at = event['timestamp']
+        if last_event_at is not None and punched_at <= last_event_at:
+            yield index, event, None, None, 'Punch is older than the latest clock event'
+            continue
+
+        action = event['action']
+        if action == 'toggle':
+            action = 'clock_out' if open_log is not None else 'clock_in'
+
+        if action == 'clock_in':
+            if open_log is not None:
+                yield index, event, action, None, 'User is already clocked in'
+                continue
+            open_log = TimeLog(user_id=event['user_id'], clock_in=punched_at)
+            yield index, event, action, open_log, None
+        else:
+            if open_log is None:
+                yield index, event, action, None, 'No active clock-in session found'
+                continue
+            open_log.clock_out = punched_at
+            yield index, event, action, open_log, None
+            open_log = None
+
+        last_event_at = punched_at
+
+
+def sync_punches(events, now=None):
+    """
+    Apply a batch of offline kiosk punches. Each event is
+    {id, access_code, timestamp, action} where action is clock_in, clock_out
+    or toggle (the default). Events are replayed per user in timestamp order
+    on top of their latest time log, then written in one transaction with
+    bulk inserts and updates. Event ids already synced return their original
+    outcome as a duplicate instead of being applied again.
+
+    Timestamps more than PUNCH_SYNC_MAX_AGE_HOURS old are invalid, so a
+    client cannot backdate a clock-in to credit itself past hours.
+
+    Returns one result per event, in request order, with status applied,
+    rejected (does not fit the clock state), duplicate or invalid.
+    """
+    if now is None:
+        now = timezone.now()
+
+    results = [None] * len(events)
+    valid = []
+    first_index = {}
+    repeats = []
+    for index, raw in enumerate(events):
+        event_id = raw.get('id') if isinstance(raw, dict) else None
+        serializer = PunchEventSerializer(data=raw if isinstance(raw, dict) else {})
+        if not serializer.is_valid():
+            results[index] = {'id': event_id, 'status': 'invalid', 'errors': serializer.errors}
+            continue
+
+        event = dict(serializer.validated_data)
+        if event['id'] in first_index:
+            repeats.append((index, first_index[event['id']]))
+            continue
+        first_index[event['id']] = index
+
+        if event['timestamp'] > now + PUNCH_SYNC_MAX_SKEW:
+            results[index] = _result(event['id'], 'invalid', error='Timestamp is in the future')
+            continue
+        if event['timestamp'] < now - timedelta(hours=settings.PUNCH_SYNC_MAX_AGE_HOURS):
+            results[index] = _result(event['id'], 'invalid', error='Timestamp is too old to sync')
+            continue
+        valid.append((index, event))
+
+    user_ids = dict(
+        User.objects
+        .filter(access_code__in={event['access_code'] for _, event in valid})
+        .values_list('access_code', 'id')
+    )
+    by_user = defaultdict(list)
+    for index, event in valid:
+        event['user_id'] = user_ids.get(event['access_code'])
+        if event['user_id'] is None:
+            results[index] = _result(event['id'], 'invalid', error='Invalid access code')
+        else:
+            by_user[event['user_id']].append((index, event))
+
+    if by_user:
+        try:
+            with transaction.atomic():
+                _apply(by_user, results)
+        except IntegrityError:
+            raise PunchSyncConflict('A user was clocked in by another request, retry the batch')
+
+    for index, original in repeats:
+        results[index] = dict(results[original], status='duplicate')
+    return results
+
+
+def _apply(by_user, results):
+    # Concurrent syncs for the same users queue here, so the duplicate check
+    # below sees every event id committed before us
+    list(
+        User.objects.select_for_update()
+        .filter(id__in=list(by_user))
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+
+    processed = {
+        punch_event.client_id: punch_event
+        for punch_event in PunchEvent.objects.filter(
+            client_id__in=[event['id'] for events in by_user.values() for _, event in events]
+        )
+    }
+
+    # Lock open logs so a live clock-out waits for this batch instead of
+    # being overwritten by it
+    open_logs = {
+        time_log.user_id: time_log
+        for time_log in TimeLog.objects.select_for_update().filter(
+            user_id__in=list(by_user), clock_out__isnull=True
+        )
+    }
+    latest = {
+        time_log.user_id: time_log.clock_out or time_log.clock_in
+        for time_log in TimeLog.objects
+        .filter(user_id__in=list(by_user))
+        .order_by('user_id', '-clock_in', '-id')
+        .distinct('user_id')
+    }
+
+    closed_existing = []
+    new_logs = []
+    outcomes = []
+    for user_id, events in by_user.items():
+        pending = []
+        for index, event in events:
+            if event['id'] in processed:
+                results[index] = _stored_result(processed[event['id']])
+            else:
+                pending.append((index, event))
+        pending.sort(key=lambda item: (item[1]['timestamp'], item[0]))
+
+        open_log = open_logs.get(user_id)
+        for index, event, action, time_log, error in _replay(pending, open_log, latest.get(user_id)):
+            outcomes.append((index, event, action, time_log, error))
+            if time_log is None:
+                continue
+            if time_log.pk is not None:
+                closed_existing.append(time_log)
+            elif action == 'clock_in':
+                new_logs.append(time_log)
+
+    # Close before opening, or the new open log would collide with the old
+    # one on the one-open-shift-per-user index
+    TimeLog.objects.bulk_update(closed_existing, ['clock_out'])
+    TimeLog.objects.bulk_create(new_logs)
+    record_sessions(closed_existing + new_logs)
+
+    # One presence event per log touched, in its final state
+    touched = {}
+    for _, event, _, time_log, _ in sorted(outcomes, key=lambda item: item[1]['timestamp']):
+        if time_log is not None:
+            touched.pop(id(time_log), None)
+            touched[id(time_log)] = time_log
+    publish_clock_events(touched.values())
+
+    punch_events = []
+    for index, event, action, time_log, error in outcomes:
+        punch_events.append(PunchEvent(
+            client_id=event['id'],
+            user_id=event['user_id'],
+            time_log=time_log,
+            action=action or '',
+            punched_at=event['timestamp'],
+            status='rejected' if error else 'applied',
+            error=error or '',
+        ))
+        results[index] = _result(
+            event['id'],
+            'rejected' if error else 'applied',
+            action,
+            time_log.pk if time_log is not None else None,
+            error,
+        )
+    PunchEvent.objects.bulk_create(punch_events)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.core.validators import RegexValidator
-from .models import User, TimeLog, AllowedIP, Committee, UserCommittee
+from django.db.models import Count, Prefetch
+from .models import User, TimeLog, AllowedIP, Committee, UserCommittee, normalize_ip_network
 from django.utils import timezone
 
 
@@ -26,6 +27,20 @@ class AllowedIPSerializer(serializers.ModelSerializer):
         model = AllowedIP
         fields = ['id', 'ip_address', 'label', 'created_by', 'created_by_name', 'created_at']
         read_only_fields = ['created_at', 'created_by_name']
+    
+    def validate_ip_address(self, value):
+        """Accept a single IP address or a CIDR network"""
+        try:
+            value = normalize_ip_network(value)
+        except ValueError:
+            raise serializers.ValidationError('Enter a valid IP address or CIDR network.')
+        
+        existing = AllowedIP.objects.filter(ip_address=value)
+        if self.instance is not None:
+            existing = existing.exclude(pk=self.instance.pk)
+        if existing.exists():
+            raise serializers.ValidationError('This IP address is already in the allowed list.')
+        return value
 
 
 class TimeLogSerializer(serializers.ModelSerializer):
@@ -107,6 +122,26 @@ class ClockOutSerializer(serializers.Serializer):
     )
 
 
+class PunchEventSerializer(serializers.Serializer):
+    """One punch recorded by a kiosk while offline"""
+    id = serializers.CharField(max_length=64)
+    access_code = serializers.CharField(
+        max_length=6, 
+        min_length=6,
+        validators=[
+            RegexValidator(
+                regex=r'^\d{6}$',
+                message='Access code must be exactly 6 digits'
+            )
+        ]
+    )
+    timestamp = serializers.DateTimeField()
+    action = serializers.ChoiceField(
+        choices=['toggle', 'clock_in', 'clock_out'],
+        default='toggle'
+    )
+
+
 class TimeLogExportSerializer(serializers.ModelSerializer):
     user_access_code = serializers.CharField(source='user.access_code', read_only=True)
     user_full_name = serializers.CharField(source='user.full_name', read_only=True)
@@ -143,13 +178,32 @@ class CommitteeSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'chair', 'members', 'member_count', 'created_at']
         read_only_fields = ['created_at']
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Load chairs, members and member counts for a committee queryset in a
+        constant number of queries (use before serializing many committees)
+        """
+        return queryset.select_related('chair').prefetch_related(
+            Prefetch(
+                'usercommittee_set',
+                queryset=UserCommittee.objects.select_related('user').order_by('user__full_name'),
+                to_attr='memberships',
+            )
+        ).annotate(num_members=Count('usercommittee'))
+    
     def get_members(self, obj):
         """Get all members of the committee"""
-        members = User.objects.filter(usercommittee__committee=obj).order_by('full_name')
+        if hasattr(obj, 'memberships'):
+            members = [membership.user for membership in obj.memberships]
+        else:
+            members = User.objects.filter(usercommittee__committee=obj).order_by('full_name')
         return CommitteeMemberSerializer(members, many=True).data
     
     def get_member_count(self, obj):
         """Get the count of members in the committee"""
+        if hasattr(obj, 'num_members'):
+            return obj.num_members
         return User.objects.filter(usercommittee__committee=obj).count()
 
 
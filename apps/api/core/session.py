@@ -1,7 +1,9 @@
 from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.contrib.sessions.backends.signed_cookies import SessionStore as SignedCookieStore
 from django.conf import settings
+from django.core import signing
 from django.utils import timezone
-from datetime import timedelta
+from datetime import datetime, timedelta
 import threading
 
 # Thread-local storage for app_type context
@@ -18,16 +20,30 @@ def get_app_type():
     return getattr(_thread_locals, 'app_type', None)
 
 
-class SessionStore(DBStore):
+class AppSessionMixin:
     """
-    Custom session store that applies app-specific session configurations.
-    This ensures that clock app sessions are isolated from hub app sessions.
+    Applies app-specific session configurations on top of a Django session
+    backend. This ensures that clock app sessions are isolated from hub app
+    sessions, whichever store (DB, cached DB, ...) holds them.
     """
     
+    def __new__(cls, session_key=None):
+        # Clock sessions can live entirely in a signed cookie instead of the
+        # server-side store (CLOCK_SESSION_STORE = 'signed_cookie')
+        if (
+            not issubclass(cls, ClockCookieSessionStore)
+            and get_app_type() == 'clock'
+            and getattr(settings, 'CLOCK_SESSION_STORE', 'server') == 'signed_cookie'
+        ):
+            return ClockCookieSessionStore(session_key)
+        return super().__new__(cls)
+    
     def __init__(self, session_key=None):
         super().__init__(session_key)
         # Get the app type from thread-local storage
         self.app_type = get_app_type()
+        # Serialized session data as last loaded/saved, to detect changes
+        self._loaded_state = None
     
     def _get_session_config(self):
         """Get the appropriate session configuration based on app type"""
@@ -44,9 +60,13 @@ class SessionStore(DBStore):
         super().create()
         config = self._get_session_config()
         
-        # Set session expiry based on app configuration
+        # Set session expiry based on app configuration. Clock sessions get an
+        # absolute expiry date so that saving them never pushes it forward.
         if 'SESSION_COOKIE_AGE' in config:
-            self.set_expiry(config['SESSION_COOKIE_AGE'])
+            if self.app_type == 'clock':
+                self.set_expiry(timezone.now() + timedelta(seconds=config['SESSION_COOKIE_AGE']))
+            else:
+                self.set_expiry(config['SESSION_COOKIE_AGE'])
         
         # For hub sessions, also set an absolute expiry cap
         if self.app_type == 'hub':
@@ -72,7 +92,43 @@ class SessionStore(DBStore):
         if '_app_type' not in self:
             self['_app_type'] = self.app_type
         
+        if self._can_skip_save(must_create, config):
+            return
+        
+        if self._refresh_fraction() and self.app_type == 'hub':
+            self['_persisted_at'] = timezone.now().timestamp()
+        
         super().save(must_create)
+        self._loaded_state = self._serialize_state(self._session)
+    
+    def _serialize_state(self, data):
+        return self.serializer().dumps(data)
+    
+    def _refresh_fraction(self):
+        """Fraction of the hub window after which a sliding expiry is re-persisted"""
+        return getattr(settings, 'HUB_SESSION_REFRESH_FRACTION', 0)
+    
+    def _can_skip_save(self, must_create, config):
+        """
+        A save can be skipped when the data did not change since it was loaded
+        and the stored expiry is still good enough: either it is fixed (clock
+        sessions), or it is sliding but was persisted less than
+        HUB_SESSION_REFRESH_FRACTION of the window ago.
+        """
+        if must_create or self.session_key is None or self._loaded_state is None:
+            return False
+        if self._serialize_state(self._session) != self._loaded_state:
+            return False
+        
+        if isinstance(self.get('_session_expiry'), str):
+            return True
+        
+        fraction = self._refresh_fraction()
+        persisted_at = self.get('_persisted_at')
+        if self.app_type != 'hub' or not fraction or persisted_at is None:
+            return False
+        age = config.get('SESSION_COOKIE_AGE', settings.SESSION_COOKIE_AGE)
+        return timezone.now().timestamp() - persisted_at < age * fraction
     
     def load(self):
         """Load session and restore app type"""
@@ -90,6 +146,61 @@ class SessionStore(DBStore):
                     self.delete()
                 except Exception:
                     pass
+                # Start over as a fresh session so save() won't update the deleted row
+                self._session_key = None
                 return {}
         
-        return session_data
\ No newline at end of file
+        self._loaded_state = self._serialize_state(session_data) if session_data else None
+        return session_data
+
+
+class SessionStore(AppSessionMixin, DBStore):
+    """
+    Custom session store that applies app-specific session configurations.
+    This ensures that clock app sessions are isolated from hub app sessions.
+    """
+
+
+class NonSlidingSignedCookieStore(SignedCookieStore):
+    """
+    Signed cookie store that honours an absolute `_session_expiry` and uses
+    the clock app cookie age as the signature max age.
+    """
+    
+    def get_session_cookie_age(self):
+        config = getattr(settings, 'CLOCK_APP_SESSION_CONFIG', {})
+        return config.get('SESSION_COOKIE_AGE', settings.SESSION_COOKIE_AGE)
+    
+    def load(self):
+        """Load the data from the signed cookie, dropping it once expired"""
+        try:
+            data = signing.loads(
+                self.session_key,
+                serializer=self.serializer,
+                max_age=self.get_session_cookie_age(),
+                salt='django.contrib.sessions.backends.signed_cookies',
+            )
+        except Exception:
+            data = None
+        
+        expiry = data.get('_session_expiry') if data else None
+        if isinstance(expiry, str) and datetime.fromisoformat(expiry) <= timezone.now():
+            data = None
+        
+        if not data:
+            self._session_key = None
+            return {}
+        return data
+
+
+class ClockCookieSessionStore(AppSessionMixin, NonSlidingSignedCookieStore):
+    """
+    Stateless clock session kept in a signed, timestamped cookie. Same
+    non-sliding expiry as server-side clock sessions, but no session table
+    reads or writes. Cannot be revoked server-side before it expires.
+    """
+    
+    def cycle_key(self):
+        # Login cycles the key; start a fresh clock session with its own expiry
+        self.create()
+        self.save()
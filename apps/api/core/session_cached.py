@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.contrib.sessions.backends.base import CreateError
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+
+from .session import AppSessionMixin
+
+KEY_PREFIX = 'core.session_cached'
+
+
+class AppCachedDBStore(CachedDBStore):
+    """
+    Cached DB store that can keep clock sessions in the cache alone
+    (CLOCK_SESSION_CACHE_ONLY). Unchanged sessions are not written at all,
+    see AppSessionMixin.save().
+    """
+    cache_key_prefix = KEY_PREFIX
+
+    def _is_cache_only(self):
+        return self.app_type == 'clock' and getattr(settings, 'CLOCK_SESSION_CACHE_ONLY', False)
+
+    def load(self):
+        if self._is_cache_only():
+            try:
+                data = self._cache.get(self.cache_key)
+            except Exception:
+                data = None
+            if data is None:
+                self._session_key = None
+                data = {}
+        else:
+            data = super().load()
+        return data
+
+    def exists(self, session_key):
+        if self._is_cache_only():
+            return bool(session_key) and (self.cache_key_prefix + session_key) in self._cache
+        return super().exists(session_key)
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+
+        if self._is_cache_only():
+            data = self._get_session(no_load=must_create)
+            func = self._cache.add if must_create else self._cache.set
+            result = func(self.cache_key, data, self.get_expiry_age())
+            if must_create and not result:
+                raise CreateError
+        else:
+            super().save(must_create)
+
+    def delete(self, session_key=None):
+        if self._is_cache_only():
+            if session_key is None:
+                if self.session_key is None:
+                    return
+                session_key = self.session_key
+            self._cache.delete(self.cache_key_prefix + session_key)
+            return
+        super().delete(session_key)
+
+
+class SessionStore(AppSessionMixin, AppCachedDBStore):
+    """
+    App-aware session store that reads sessions from SESSION_CACHE_ALIAS and
+    writes through to the database.
+    Keeps the clock/hub isolation, the non-sliding clock expiry and the hub
+    absolute expiry cap of core.session.SessionStore.
+    """
@@ -0,0 +1,83 @@
+from collections import Counter
+from importlib import import_module
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.utils import timezone
+
+
+class SweepStats:
+    """Totals collected while sweeping expired sessions"""
+
+    def __init__(self):
+        self.deleted = 0
+        self.batches = 0
+        self.elapsed = 0.0
+        self.by_app_type = Counter()
+
+    @property
+    def rate(self):
+        """Deleted rows per second"""
+        return self.deleted / self.elapsed if self.elapsed else 0.0
+
+    def merge(self, other):
+        self.deleted += other.deleted
+        self.batches += other.batches
+        self.elapsed += other.elapsed
+        self.by_app_type.update(other.by_app_type)
+
+
+def _decoder():
+    # Both core session engines sign with the same salt, so either decodes
+    return import_module(settings.SESSION_ENGINE).SessionStore()
+
+
+def _delete_batch(decoder, now, batch_size):
+    """Delete one batch of the oldest expired sessions, returning their app types"""
+    with transaction.atomic():
+        rows = list(
+            Session.objects
+            .select_for_update(skip_locked=True)
+            .filter(expire_date__lt=now)
+            .order_by('expire_date')
+            .values_list('session_key', 'session_data')[:batch_size]
+        )
+        if not rows:
+            return Counter()
+
+        Session.objects.filter(session_key__in=[key for key, _ in rows]).delete()
+
+    return Counter(decoder.decode(data).get('_app_type') or 'unknown' for _, data in rows)
+
+
+def sweep_expired_sessions(batch_size=1000, pause=0.0, max_batches=None, now=None):
+    """
+    Delete expired rows from the session table in batches of `batch_size`,
+    oldest first along the expire_date index, committing after each batch so
+    locks are only ever held on one batch. Sleeps `pause` seconds between
+    batches. Sessions expiring after `now` (default: start of the sweep) are
+    left alone.
+    """
+    now = now or timezone.now()
+    decoder = _decoder()
+    stats = SweepStats()
+    started = time.monotonic()
+
+    while max_batches is None or stats.batches < max_batches:
+        app_types = _delete_batch(decoder, now, batch_size)
+        deleted = sum(app_types.values())
+        if not deleted:
+            break
+
+        stats.batches += 1
+        stats.deleted += deleted
+        stats.by_app_type.update(app_types)
+        if deleted < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    stats.elapsed = time.monotonic() - started
+    return stats
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .allowlist import invalidate_allowlist
+from .models import AllowedIP
+
+
+@receiver(post_save, sender=AllowedIP)
+@receiver(post_delete, sender=AllowedIP)
+def allowed_ip_changed(sender, **kwargs):
+    """Recompile the IP allowlist whenever an entry is added, edited or removed"""
+    invalidate_allowlist()
@@ -0,0 +1,132 @@
+from django.db.models import F
+from django.utils import timezone
+from collections import defaultdict
+from datetime import timedelta
+
+from .models import TimeLog, WeeklyHours
+
+
+# Rebuilds weekly_hours from closed sessions, splitting each one at Monday
+# 00:00 UTC boundaries (Django runs the connection in UTC). Adds to rows
+# already there, which hold the archived history (see core.archive)
+REBUILD_WEEKLY_HOURS_SQL = """
+    INSERT INTO weekly_hours (user_id, week_start, seconds)
+    SELECT t.user_id, w.week::date, SUM(ROUND(EXTRACT(EPOCH FROM
+               LEAST(t.clock_out, w.week + INTERVAL '7 days') - GREATEST(t.clock_in, w.week)
+           )))::bigint
+    FROM time_logs t
+    CROSS JOIN LATERAL generate_series(
+        date_trunc('week', t.clock_in), t.clock_out, INTERVAL '1 week'
+    ) AS w(week)
+    WHERE t.clock_out IS NOT NULL AND w.week < t.clock_out {user_filter}
+    GROUP BY t.user_id, w.week
+    ON CONFLICT (user_id, week_start) DO UPDATE SET seconds = weekly_hours.seconds + EXCLUDED.seconds
+"""
+
+
+def get_week_bounds(now=None):
+    """Return (week_start, week_end) for the week containing `now` (Monday 00:00)"""
+    if now is None:
+        now = timezone.now()
+    week_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    week_start = week_start - timedelta(days=week_start.weekday())
+    return week_start, week_start + timedelta(days=7)
+
+
+def split_by_week(start, end):
+    """Yield (week_start_date, seconds) for each week the interval [start, end) touches"""
+    week_start, week_end = get_week_bounds(start)
+    while week_start < end:
+        chunk = min(end, week_end) - max(start, week_start)
+        yield week_start.date(), round(chunk.total_seconds())
+        week_start, week_end = week_end, week_end + timedelta(days=7)
+
+
+def record_session(time_log, sign=1):
+    """
+    Add a closed session to the weekly rollup (or remove it with sign=-1).
+    Must be called inside the transaction that writes the TimeLog.
+    """
+    if time_log.clock_out is None:
+        return
+
+    for week_start, seconds in split_by_week(time_log.clock_in, time_log.clock_out):
+        if not seconds:
+            continue
+        delta = sign * seconds
+        rollup = WeeklyHours.objects.filter(user_id=time_log.user_id, week_start=week_start)
+        if rollup.update(seconds=F('seconds') + delta):
+            continue
+        _, created = WeeklyHours.objects.get_or_create(
+            user_id=time_log.user_id,
+            week_start=week_start,
+            defaults={'seconds': delta}
+        )
+        if not created:
+            # Lost a race with a concurrent insert for the same week
+            rollup.update(seconds=F('seconds') + delta)
+
+
+def weekly_deltas(time_logs):
+    """{(user_id, week_start_date): seconds} for the closed sessions among time_logs"""
+    deltas = defaultdict(int)
+    for time_log in time_logs:
+        if time_log.clock_out is None:
+            continue
+        for week_start, seconds in split_by_week(time_log.clock_in, time_log.clock_out):
+            deltas[time_log.user_id, week_start] += seconds
+    return deltas
+
+
+def record_sessions(time_logs):
+    """
+    Add many closed sessions to the weekly rollup, with one UPDATE per
+    (user, week) touched instead of one per session.
+    Must be called inside the transaction that writes the TimeLogs.
+    """
+    for (user_id, week_start), delta in weekly_deltas(time_logs).items():
+        if not delta:
+            continue
+        rollup = WeeklyHours.objects.filter(user_id=user_id, week_start=week_start)
+        if rollup.update(seconds=F('seconds') + delta):
+            continue
+        _, created = WeeklyHours.objects.get_or_create(
+            user_id=user_id,
+            week_start=week_start,
+            defaults={'seconds': delta}
+        )
+        if not created:
+            rollup.update(seconds=F('seconds') + delta)
+
+
+def weekly_seconds_from_rollup(users, week_start, now=None, open_sessions=None):
+    """
+    Sum the time each user logged in the week starting at `week_start` from
+    the pre-summed WeeklyHours rows, adding the live part of any open session
+    on top. Returns {user_id: seconds}. Callers that already know the open
+    sessions can pass them as {user_id: clock_in} to skip that query.
+    """
+    if now is None:
+        now = timezone.now()
+
+    totals = dict(
+        WeeklyHours.objects
+        .filter(user__in=users, week_start=week_start.date())
+        .values_list('user_id', 'seconds')
+    )
+
+    if open_sessions is None:
+        open_sessions = (
+            TimeLog.objects
+            .filter(user__in=users, clock_out__isnull=True)
+            .order_by()
+            .values_list('user_id', 'clock_in')
+        )
+    else:
+        open_sessions = open_sessions.items()
+    for user_id, clock_in in open_sessions:
+        live = (now - max(clock_in, week_start)).total_seconds()
+        if live > 0:
+            totals[user_id] = totals.get(user_id, 0) + live
+
+    return totals
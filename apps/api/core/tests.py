@@ -0,0 +1,45 @@
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from .models import Committee, User, UserCommittee
+
+
+class CommitteeListQueryCountTests(TestCase):
+    """Committee lists run the same number of queries however many committees there are"""
+
+    def setUp(self):
+        self.admin = User.objects.create(access_code='100001', full_name='Admin', role='admin')
+        self.client = Client(HTTP_X_APP_TYPE='hub')
+        response = self.client.post(
+            '/api/login/', {'access_code': '100001'}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def add_committees(self, count):
+        for _ in range(count):
+            number = Committee.objects.count() + 1
+            committee = Committee.objects.create(name=f'Committee {number}', chair=self.admin)
+            for member in range(2):
+                user = User.objects.create(full_name=f'Member {number}.{member}')
+                UserCommittee.objects.create(user=user, committee=committee)
+
+    def get_committees(self, url, count):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([len(committee['members']) for committee in response.json()], [2] * count)
+
+    def assert_constant_queries(self, url):
+        self.add_committees(1)
+        with CaptureQueriesContext(connection) as queries:
+            self.get_committees(url, 1)
+
+        self.add_committees(4)
+        with self.assertNumQueries(len(queries)):
+            self.get_committees(url, 5)
+
+    def test_committee_list(self):
+        self.assert_constant_queries('/api/committees/')
+
+    def test_my_committees(self):
+        self.assert_constant_queries('/api/chair/my_committees/')
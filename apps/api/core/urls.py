@@ -1,9 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
-    UserViewSet, TimeLogViewSet, LoginView, LogoutView, MeView,
-    TeamViewSet, AdminViewSet, ChairViewSet, AllowedIPViewSet, IpCheckView,
-    CommitteeViewSet
+    UserViewSet, TimeLogViewSet, LoginView, LogoutView, me,
+    TeamViewSet, AdminViewSet, ChairViewSet, AllowedIPViewSet, ip_check,
+    CommitteeViewSet, KioskPunchView, KioskPunchSyncView, presence_stream,
+    current_status, admin_dashboard, my_committees
 )
 
 router = DefaultRouter()
@@ -16,9 +17,16 @@ router.register(r'allowed-ips', AllowedIPViewSet, basename='allowed-ips')
 router.register(r'committees', CommitteeViewSet, basename='committees')
 
 urlpatterns = [
+    # Async views, on the URLs the viewsets served them at
+    path('time-logs/current_status/', current_status, name='timelog-current-status'),
+    path('admin/', admin_dashboard, name='admin-list'),
+    path('chair/my_committees/', my_committees, name='chair-my-committees'),
     path('', include(router.urls)),
     path('login/', LoginView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
-    path('me/', MeView.as_view(), name='me'),
-    path('ip-check/', IpCheckView.as_view(), name='ip-check'),
+    path('me/', me, name='me'),
+    path('ip-check/', ip_check, name='ip-check'),
+    path('clock/punch/', KioskPunchView.as_view(), name='kiosk-punch'),
+    path('clock/punch/sync/', KioskPunchSyncView.as_view(), name='kiosk-punch-sync'),
+    path('hub/presence/', presence_stream, name='presence-stream'),
 ] 
\ No newline at end of file
@@ -0,0 +1,129 @@
+import csv
+import io
+import json
+
+from django.db import transaction
+
+from .access_codes import allocate_access_codes, lock_access_codes
+from .models import User
+
+IMPORT_BATCH_SIZE = 500
+
+# Accepted column names, normalized (lowercase, spaces as underscores)
+COLUMN_ALIASES = {
+    'name': 'full_name',
+    'full_name': 'full_name',
+    'target_hours': 'target_hours_per_week',
+    'target_hours_per_week': 'target_hours_per_week',
+    'role': 'role',
+}
+
+ROLES = [role for role, _ in User.ROLE_CHOICES]
+FULL_NAME_MAX_LENGTH = User._meta.get_field('full_name').max_length
+DEFAULT_TARGET_HOURS = User._meta.get_field('target_hours_per_week').default
+
+
+class ImportFormatError(ValueError):
+    """The uploaded file could not be parsed at all"""
+
+
+def _normalize_row(row):
+    normalized = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        column = COLUMN_ALIASES.get(str(key).strip().lower().replace(' ', '_'))
+        if column:
+            normalized[column] = value.strip() if isinstance(value, str) else value
+    return normalized
+
+
+def parse_rows(content, content_type='csv'):
+    """Parse CSV text or a JSON list of objects into normalized row dicts"""
+    if content_type == 'json':
+        try:
+            data = json.loads(content) if isinstance(content, (str, bytes)) else content
+        except ValueError as e:
+            raise ImportFormatError(f'Invalid JSON: {e}')
+        if isinstance(data, dict):
+            data = data.get('users')
+        if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+            raise ImportFormatError('Expected a list of user objects')
+        return [_normalize_row(row) for row in data]
+
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+    reader = csv.DictReader(io.StringIO(content))
+    if not reader.fieldnames or not any(
+        COLUMN_ALIASES.get(name.strip().lower().replace(' ', '_')) == 'full_name'
+        for name in reader.fieldnames
+    ):
+        raise ImportFormatError('CSV needs a header row with a full_name (or name) column')
+    return [_normalize_row(row) for row in reader]
+
+
+def validate_row(row):
+    """Return (user, errors) for one normalized row; user is unsaved"""
+    errors = {}
+
+    full_name = row.get('full_name') or ''
+    if not full_name:
+        errors['full_name'] = 'This field is required.'
+    elif len(full_name) > FULL_NAME_MAX_LENGTH:
+        errors['full_name'] = f'Ensure this field has no more than {FULL_NAME_MAX_LENGTH} characters.'
+
+    target_hours = row.get('target_hours_per_week')
+    if target_hours in (None, ''):
+        target_hours = DEFAULT_TARGET_HOURS
+    else:
+        try:
+            target_hours = int(target_hours)
+            if target_hours < 0:
+                raise ValueError
+        except (TypeError, ValueError):
+            errors['target_hours_per_week'] = 'A valid non-negative integer is required.'
+
+    role = row.get('role') or 'member'
+    if role not in ROLES:
+        errors['role'] = f'Must be one of {", ".join(ROLES)}.'
+
+    if errors:
+        return None, errors
+    return User(full_name=full_name, role=role, target_hours_per_week=target_hours), None
+
+
+def import_users(rows, batch_size=IMPORT_BATCH_SIZE, dry_run=False):
+    """
+    Create users from parsed rows. Invalid rows are reported and skipped;
+    valid rows get access codes allocated in one pass and are inserted with
+    bulk_create in batches, all in one transaction. Row numbers are 1-based
+    data rows.
+    """
+    users = []
+    errors = []
+    for number, row in enumerate(rows, start=1):
+        user, row_errors = validate_row(row)
+        if row_errors:
+            errors.append({'row': number, 'errors': row_errors})
+        else:
+            users.append((number, user))
+
+    if users and not dry_run:
+        with transaction.atomic():
+            lock_access_codes()
+            codes = allocate_access_codes(len(users))
+            for (_, user), code in zip(users, codes):
+                user.access_code = code
+            User.objects.bulk_create([user for _, user in users], batch_size=batch_size)
+
+    created = [
+        {
+            'row': number,
+            'id': user.id,
+            'full_name': user.full_name,
+            'access_code': user.access_code,
+            'role': user.role,
+        }
+        for number, user in users
+    ]
+    return {'created': created, 'errors': errors}
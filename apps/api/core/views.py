@@ -3,14 +3,18 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Q, Count, Sum
-from django.http import HttpResponse
-from django.contrib.auth import login, logout, authenticate
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+from django.contrib.auth import logout, authenticate
 from django.contrib.auth.models import User as AuthUser
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
 from django.utils.decorators import method_decorator
-import csv
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 from .models import User, TimeLog, AllowedIP, Committee, UserCommittee
 from .serializers import (
@@ -20,6 +24,22 @@ from .serializers import (
     CommitteeSerializer, CommitteeCreateSerializer, CommitteeUpdateSerializer
 )
 from .permissions import IsMember, IsChair, IsAdmin, IsOwnerOrChair, IsTeamMemberOrChair
+from . import access_codes, clock
+from .allowlist import ais_ip_allowed
+from .archive import user_archived_logs
+from .auth import login_user
+from . import dashboard
+from .bulk_export import (
+    ARCHIVE_CHOICES, PARTITION_CHOICES, export_filename, export_org_timesheets
+)
+from .export import TIME_LOG_CSV_HEADER, stream_csv, streaming_content, time_log_rows
+from . import membership
+from .pagination import KeysetPagination
+from .principal import get_principal, invalidate_principal, store_principal
+from . import presence, presence_registry
+from . import punch_sync
+from .stats import get_week_bounds, record_session, weekly_seconds_from_rollup
+from . import user_import
 
 
 class LoginView(APIView):
@@ -79,15 +99,13 @@ class LoginView(APIView):
                         if hasattr(request, 'session'):
                             request.session.flush()
             
-            # Authenticate user using custom backend
-            auth_user = authenticate(request, access_code=access_code)
+            # Authenticate user using custom backend (returns the core User)
+            custom_user = authenticate(request, access_code=access_code)
             
-            if auth_user is not None:
-                # Log the user in
-                login(request, auth_user)
-                
-                # Get the custom user data
-                custom_user = User.objects.get(access_code=access_code)
+            if custom_user is not None:
+                # Log the user in and snapshot them into the session
+                login_user(request, custom_user)
+                store_principal(request, custom_user)
                 
                 # Prepare response data
                 response_data = {
@@ -144,30 +162,113 @@ class LogoutView(APIView):
         return response
 
 
+class KioskPunchView(APIView):
+    """
+    Clock kiosk punch: an access code toggles the member's clock state in a
+    single request, without creating a session. Lives under /api/clock/ so
+    IPRestrictionMiddleware only lets allowed kiosk IPs through.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    
+    def post(self, request):
+        serializer = LoginRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        access_code = serializer.validated_data['access_code']
+        custom_user = User.objects.filter(access_code=access_code).first()
+        if custom_user is None:
+            return Response(
+                {'error': 'Invalid access code'}, 
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+        
+        now = timezone.now()
+        try:
+            time_log = clock.toggle(custom_user.id, now)
+        except clock.ClockConflict as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        time_log.user = custom_user
+        
+        # This week's total, with the just-opened session (if any) counted live
+        week_start, _ = get_week_bounds(now)
+        open_sessions = {custom_user.id: time_log.clock_in} if time_log.clock_out is None else {}
+        weekly_seconds = weekly_seconds_from_rollup(
+            [custom_user.id], week_start, now, open_sessions=open_sessions
+        ).get(custom_user.id, 0)
+        
+        return Response({
+            'action': 'clock_out' if time_log.clock_out else 'clock_in',
+            'full_name': custom_user.full_name,
+            'time_log': TimeLogSerializer(time_log).data,
+            'weekly_hours': round(weekly_seconds / 3600, 2),
+            'target_hours_per_week': custom_user.target_hours_per_week
+        }, status=status.HTTP_200_OK if time_log.clock_out else status.HTTP_201_CREATED)
+
+
+class KioskPunchSyncView(APIView):
+    """
+    Batched punch upload for kiosks that were offline: applies the queued
+    punches in one transaction and reports an outcome per punch. Punch ids
+    make retries safe. Lives under /api/clock/ like KioskPunchView.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+    
+    def post(self, request):
+        events = request.data.get('events') if isinstance(request.data, dict) else request.data
+        if not isinstance(events, list) or not events:
+            return Response(
+                {'error': 'events must be a non-empty list'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(events) > punch_sync.PUNCH_SYNC_MAX_EVENTS:
+            return Response(
+                {'error': f'At most {punch_sync.PUNCH_SYNC_MAX_EVENTS} events per batch'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            results = punch_sync.sync_punches(events)
+        except punch_sync.PunchSyncConflict as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        
+        summary = {key: 0 for key in ('applied', 'duplicate', 'rejected', 'invalid')}
+        for result in results:
+            summary[result['status']] += 1
+        return Response({'results': results, 'summary': summary}, status=status.HTTP_200_OK)
+
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all().order_by('full_name')
     serializer_class = UserSerializer
     permission_classes = [IsAdmin]  # Only admins can manage users
 
+    def perform_update(self, serializer):
+        """Re-check session principals after role or access code edits"""
+        invalidate_principal(serializer.save())
+
+    def perform_destroy(self, instance):
+        invalidate_principal(instance)
+        instance.delete()
+        access_codes.delete_auth_users([instance.access_code])
+        presence_registry.invalidate_registry()
+
 
 class TimeLogViewSet(viewsets.ModelViewSet):
     queryset = TimeLog.objects.all()
     serializer_class = TimeLogSerializer
     permission_classes = [IsOwnerOrChair]  # Users can only see their own logs, chairs can see all
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         """Filter by authenticated user from session"""
-        queryset = TimeLog.objects.all()
+        queryset = TimeLog.objects.select_related('user')
         
-        # Get the authenticated user from session
+        # Get the authenticated principal from session
         if self.request.user.is_authenticated:
-            # Find our custom user by the auth user's username (which is the access_code)
-            try:
-                custom_user = User.objects.get(access_code=self.request.user.username)
-                queryset = queryset.filter(user=custom_user)
-            except User.DoesNotExist:
-                # If custom user doesn't exist, return empty queryset
-                return TimeLog.objects.none()
+            queryset = queryset.filter(user_id=self.request.user.id)
         else:
             # If user not authenticated, return empty queryset
             return TimeLog.objects.none()
@@ -175,6 +276,28 @@ class TimeLogViewSet(viewsets.ModelViewSet):
         # Order by most recent first
         return queryset.order_by('-clock_in')
 
+    def paginate_queryset(self, queryset):
+        """Page through the user's archived history as well"""
+        archived_user_id = self.request.user.id if self.request.user.is_authenticated else None
+        return self.paginator.paginate_queryset(
+            queryset, self.request, view=self, archived_user_id=archived_user_id
+        )
+
+    def perform_update(self, serializer):
+        """Keep the weekly rollup in sync when a log is edited"""
+        with transaction.atomic():
+            previous = TimeLog.objects.select_for_update().get(pk=serializer.instance.pk)
+            record_session(previous, sign=-1)
+            record_session(serializer.save())
+            presence_registry.invalidate_registry()
+
+    def perform_destroy(self, instance):
+        """Remove a deleted log's time from the weekly rollup"""
+        with transaction.atomic():
+            record_session(instance, sign=-1)
+            instance.delete()
+            presence_registry.invalidate_registry()
+
     @action(detail=False, methods=['post'])
     def clock_in(self, request):
         """Clock in the authenticated user"""
@@ -185,31 +308,14 @@ class TimeLogViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         
-        try:
-            custom_user = User.objects.get(access_code=request.user.username)
-        except User.DoesNotExist:
-            return Response(
-                {'error': 'User not found'}, 
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
-        # Check if user is already clocked in
-        active_log = TimeLog.objects.filter(
-            user=custom_user,
-            clock_out__isnull=True
-        ).first()
+        custom_user = request.user
         
-        if active_log:
-            return Response(
-                {'error': 'User is already clocked in'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Create new time log
-        time_log = TimeLog.objects.create(
-            user=custom_user,
-            clock_in=timezone.now()
-        )
+        # Open a new time log unless one is already open (single statement,
+        # so concurrent taps can't both get in)
+        try:
+            time_log = clock.clock_in(custom_user.id)
+        except clock.ClockConflict as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
         
         return Response(
             TimeLogSerializer(time_log).data, 
@@ -226,63 +332,19 @@ class TimeLogViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         
-        try:
-            custom_user = User.objects.get(access_code=request.user.username)
-        except User.DoesNotExist:
-            return Response(
-                {'error': 'User not found'}, 
-                status=status.HTTP_404_NOT_FOUND
-            )
+        custom_user = request.user
         
-        # Find active time log
-        active_log = TimeLog.objects.filter(
-            user=custom_user,
-            clock_out__isnull=True
-        ).first()
-        
-        if not active_log:
-            return Response(
-                {'error': 'No active clock-in session found'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Clock out
-        active_log.clock_out = timezone.now()
-        active_log.save()
+        # Close the open time log and fold it into the weekly rollup
+        try:
+            time_log = clock.clock_out(custom_user.id)
+        except clock.ClockConflict as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
         
         return Response(
-            TimeLogSerializer(active_log).data, 
+            TimeLogSerializer(time_log).data, 
             status=status.HTTP_200_OK
         )
 
-    @action(detail=False, methods=['get'])
-    def current_status(self, request):
-        """Get current clock status for authenticated user"""
-        if not request.user.is_authenticated:
-            return Response(
-                {'error': 'Authentication required'}, 
-                status=status.HTTP_401_UNAUTHORIZED
-            )
-        
-        try:
-            custom_user = User.objects.get(access_code=request.user.username)
-        except User.DoesNotExist:
-            return Response(
-                {'error': 'User not found'}, 
-                status=status.HTTP_404_NOT_FOUND
-            )
-        
-        # Get current active session
-        active_log = TimeLog.objects.filter(
-            user=custom_user,
-            clock_out__isnull=True
-        ).first()
-        
-        return Response({
-            'is_clocked_in': active_log is not None,
-            'current_session': TimeLogSerializer(active_log).data if active_log else None
-        })
-
     @action(detail=False, methods=['get'])
     def export_csv(self, request):
         """Export time logs as CSV"""
@@ -292,64 +354,30 @@ class TimeLogViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         
-        try:
-            custom_user = User.objects.get(access_code=request.user.username)
-        except User.DoesNotExist:
-            return Response(
-                {'error': 'User not found'}, 
-                status=status.HTTP_404_NOT_FOUND
-            )
+        custom_user = request.user
         
-        # Get date range from query params
-        start_date = request.GET.get('start_date')
-        end_date = request.GET.get('end_date')
+        queryset = TimeLog.objects.filter(user_id=custom_user.id)
         
-        queryset = TimeLog.objects.filter(user=custom_user)
+        # Plain clock_in bounds (not __date) so only the months in range are scanned
+        paginator = KeysetPagination()
+        queryset = paginator.filter_date_range(queryset, request)
+        start, end = paginator.get_date_range(request)
         
-        if start_date:
-            queryset = queryset.filter(clock_in__date__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(clock_in__date__lte=end_date)
-        
-        # Create CSV response
-        response = HttpResponse(content_type='text/csv')
+        # Stream the CSV so memory stays flat whatever the date range,
+        # reading older history from the archive
+        rows = time_log_rows(
+            queryset.order_by('-clock_in'),
+            archived=user_archived_logs(custom_user.id, start, end, descending=True)
+        )
+        response = StreamingHttpResponse(
+            streaming_content(request, stream_csv(TIME_LOG_CSV_HEADER, rows)),
+            content_type='text/csv'
+        )
         response['Content-Disposition'] = f'attachment; filename="time_logs_{custom_user.access_code}.csv"'
         
-        writer = csv.writer(response)
-        writer.writerow(['Date', 'Clock In', 'Clock Out', 'Duration (hours)'])
-        
-        for log in queryset.order_by('-clock_in'):
-            duration = log.duration.total_seconds() / 3600 if log.duration else None
-            writer.writerow([
-                log.clock_in.strftime('%Y-%m-%d'),
-                log.clock_in.strftime('%H:%M:%S'),
-                log.clock_out.strftime('%H:%M:%S') if log.clock_out else '',
-                f'{duration:.2f}' if duration else ''
-            ])
-        
         return response
 
 
-class MeView(APIView):
-    """Get current authenticated user information"""
-    permission_classes = [permissions.IsAuthenticated]
-    
-    def get(self, request):
-        try:
-            custom_user = User.objects.get(access_code=request.user.username)
-            return Response({
-                'user_id': custom_user.id,
-                'access_code': custom_user.access_code,
-                'full_name': custom_user.full_name,
-                'role': custom_user.role
-            })
-        except User.DoesNotExist:
-            return Response(
-                {'error': 'User not found'}, 
-                status=status.HTTP_404_NOT_FOUND
-            )
-
-
 class TeamViewSet(viewsets.ViewSet):
     """Team management endpoints for chairs and admins"""
     permission_classes = [IsChair]
@@ -357,7 +385,7 @@ class TeamViewSet(viewsets.ViewSet):
     def list(self, request):
         """Get team members based on user role and committee filter"""
         try:
-            custom_user = User.objects.get(access_code=request.user.username)
+            custom_user = request.user
             committee_id = request.GET.get('committee_id')
             
             # Role-based team member filtering
@@ -376,7 +404,7 @@ class TeamViewSet(viewsets.ViewSet):
                 if committee_id:
                     # Specific committee requested - check if user chairs it
                     try:
-                        committee = Committee.objects.get(id=committee_id, chair=custom_user)
+                        committee = Committee.objects.get(id=committee_id, chair_id=custom_user.id)
                         team_members = User.objects.filter(
                             usercommittee__committee=committee
                         ).exclude(id=custom_user.id).distinct().order_by('full_name')
@@ -387,7 +415,7 @@ class TeamViewSet(viewsets.ViewSet):
                         )
                 else:
                     # No specific committee - show all members from committees they chair
-                    chaired_committees = Committee.objects.filter(chair=custom_user)
+                    chaired_committees = Committee.objects.filter(chair_id=custom_user.id)
                     team_members = User.objects.filter(
                         usercommittee__committee__in=chaired_committees
                     ).exclude(id=custom_user.id).distinct().order_by('full_name')
@@ -398,52 +426,21 @@ class TeamViewSet(viewsets.ViewSet):
                     status=status.HTTP_403_FORBIDDEN
                 )
             
-            # Add time tracking statistics for each member
+            # Add this week's hours from the rollup plus any ongoing session
+            now = timezone.now()
+            week_start, _ = get_week_bounds(now)
+            weekly_seconds = weekly_seconds_from_rollup(team_members, week_start, now)
+            
             team_data = []
             for member in team_members:
-                try:
-                    # Get this week's hours (including ongoing sessions)
-                    week_start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
-                    week_start = week_start - timedelta(days=week_start.weekday())
-                    now = timezone.now()
-                    
-                    # Calculate total hours for the week
-                    weekly_hours = 0
-                    
-                    # Get all time logs for this user that overlap with the current week
-                    time_logs = TimeLog.objects.filter(user=member)
-                    
-                    for log in time_logs:
-                        # Check if this log overlaps with the current week
-                        clock_in = log.clock_in
-                        clock_out = log.clock_out if log.clock_out else now
-                        
-                        # If session overlaps with the week, include it
-                        if clock_in <= week_start + timedelta(days=7) and clock_out >= week_start:
-                            # Calculate the overlap with the week
-                            overlap_start = max(clock_in, week_start)
-                            overlap_end = min(clock_out, week_start + timedelta(days=7))
-                            duration = overlap_end - overlap_start
-                            weekly_hours += duration.total_seconds() / 3600
-                    
-                    team_data.append({
-                        'id': str(member.id),  # Convert to string to match frontend expectations
-                        'name': member.full_name,
-                        'role': member.role,
-                        'target_hours_per_week': member.target_hours_per_week,
-                        'access_code': member.access_code,
-                        'totalHoursThisWeek': round(weekly_hours, 2)
-                    })
-                except Exception as e:
-                    # Log the error but continue with other members
-                    team_data.append({
-                        'id': str(member.id),
-                        'name': member.full_name,
-                        'role': member.role,
-                        'target_hours_per_week': member.target_hours_per_week,
-                        'access_code': member.access_code,
-                        'totalHoursThisWeek': 0
-                    })
+                team_data.append({
+                    'id': str(member.id),  # Convert to string to match frontend expectations
+                    'name': member.full_name,
+                    'role': member.role,
+                    'target_hours_per_week': member.target_hours_per_week,
+                    'access_code': member.access_code,
+                    'totalHoursThisWeek': round(weekly_seconds.get(member.id, 0) / 3600, 2)
+                })
             
             return Response(team_data)
         except User.DoesNotExist:
@@ -462,7 +459,7 @@ class TeamViewSet(viewsets.ViewSet):
         """Get timesheet for a specific team member"""
         try:
             member = User.objects.get(id=pk)
-            custom_user = User.objects.get(access_code=request.user.username)
+            custom_user = request.user
             
             # Check if user has permission to view this member's data
             if custom_user.role == 'member' and custom_user.id != member.id:
@@ -471,10 +468,14 @@ class TeamViewSet(viewsets.ViewSet):
                     status=status.HTTP_403_FORBIDDEN
                 )
             
-            # Get time logs for the member
-            time_logs = TimeLog.objects.filter(user=member).order_by('-clock_in')
+            # Page through the member's time logs, newest first
+            paginator = KeysetPagination()
+            time_logs = paginator.paginate_queryset(
+                TimeLog.objects.filter(user_id=member.id).select_related('user'), request, view=self,
+                archived_user_id=member.id
+            )
             
-            return Response(TimeLogSerializer(time_logs, many=True).data)
+            return paginator.get_paginated_response(TimeLogSerializer(time_logs, many=True).data)
         except User.DoesNotExist:
             return Response(
                 {'error': 'User not found'}, 
@@ -486,33 +487,6 @@ class AdminViewSet(viewsets.ViewSet):
     """Admin-only endpoints"""
     permission_classes = [IsAdmin]
     
-    def list(self, request):
-        """Get system statistics for admin dashboard"""
-        try:
-            # Get basic statistics
-            total_users = User.objects.count()
-            total_logs = TimeLog.objects.count()
-            active_sessions = TimeLog.objects.filter(clock_out__isnull=True).count()
-            
-            # Get role distribution
-            role_stats = User.objects.values('role').annotate(count=Count('id'))
-            
-            # Get recent activity
-            recent_logs = TimeLog.objects.select_related('user').order_by('-clock_in')[:10]
-            
-            return Response({
-                'total_users': total_users,
-                'total_logs': total_logs,
-                'active_sessions': active_sessions,
-                'role_distribution': list(role_stats),
-                'recent_activity': TimeLogSerializer(recent_logs, many=True).data
-            })
-        except Exception as e:
-            return Response(
-                {'error': str(e)}, 
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-    
     @action(detail=False, methods=['post'])
     def create_user(self, request):
         """Create a new user (admin only) - access_code is auto-generated by database"""
@@ -523,12 +497,43 @@ class AdminViewSet(viewsets.ViewSet):
             return Response(UserSerializer(user).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['post'])
+    def import_users(self, request):
+        """Bulk create users from an uploaded CSV file or a JSON list (admin only)"""
+        try:
+            upload = request.FILES.get('file')
+            if upload is not None:
+                content_type = 'json' if upload.name.lower().endswith('.json') else 'csv'
+                rows = user_import.parse_rows(upload.read(), content_type)
+            elif isinstance(request.data, list):
+                rows = user_import.parse_rows(request.data, 'json')
+            else:
+                rows = user_import.parse_rows(request.data.get('users'), 'json')
+        except user_import.ImportFormatError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        dry_run = str(request.query_params.get('dry_run', '')).lower() in ('1', 'true')
+        try:
+            result = user_import.import_users(rows, dry_run=dry_run)
+        except access_codes.AccessCodesExhausted as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        
+        if not result['created'] and result['errors']:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            result, 
+            status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED
+        )
+    
     @action(detail=True, methods=['delete'])
     def delete_user(self, request, pk=None):
         """Delete a user (admin only)"""
         try:
             user = User.objects.get(id=pk)
+            invalidate_principal(user)
             user.delete()
+            access_codes.delete_auth_users([user.access_code])
+            presence_registry.invalidate_registry()
             return Response({'message': 'User deleted successfully'}, status=status.HTTP_200_OK)
         except User.DoesNotExist:
             return Response(
@@ -551,6 +556,7 @@ class AdminViewSet(viewsets.ViewSet):
             
             user.role = new_role
             user.save()
+            invalidate_principal(user)
             
             return Response(UserSerializer(user).data, status=status.HTTP_200_OK)
         except User.DoesNotExist:
@@ -564,94 +570,141 @@ class AdminViewSet(viewsets.ViewSet):
         """Regenerate access code for a user (admin only)"""
         try:
             user = User.objects.get(id=pk)
-            old_access_code = user.access_code
             
-            # Generate new unique access code
-            import random
-            while True:
-                new_access_code = str(random.randint(100000, 999999))
-                if not User.objects.filter(access_code=new_access_code).exists():
-                    break
-            
-            user.access_code = new_access_code
-            user.save()
+            # Rotation picks an unused code, drops the old auth user and
+            # logs the user out everywhere
+            [(user, old_access_code)] = access_codes.rotate_access_codes(User.objects.filter(id=user.id))
             
             return Response({
                 'message': 'Access code regenerated successfully',
                 'user': UserSerializer(user).data,
                 'old_access_code': old_access_code,
-                'new_access_code': new_access_code
+                'new_access_code': user.access_code
             }, status=status.HTTP_200_OK)
         except User.DoesNotExist:
             return Response(
                 {'error': 'User not found'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
-
-
-class ChairViewSet(viewsets.ViewSet):
-    """Chair-specific endpoints"""
-    permission_classes = [IsChair]
+    
+    @action(detail=False, methods=['post'])
+    def rotate_access_codes(self, request):
+        """
+        Rotate access codes in bulk (admin only). Scope is 'all', 'role'
+        (with role) or 'committee' (with committee_id).
+        """
+        scope = request.data.get('scope')
+        users = User.objects.all()
+        if scope == 'role':
+            role = request.data.get('role')
+            if role not in dict(User.ROLE_CHOICES):
+                return Response(
+                    {'error': 'A valid role is required'}, 
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            users = users.filter(role=role)
+        elif scope == 'committee':
+            try:
+                committee_id = int(request.data.get('committee_id'))
+            except (TypeError, ValueError):
+                return Response(
+                    {'error': 'A valid committee_id is required'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if not Committee.objects.filter(id=committee_id).exists():
+                return Response(
+                    {'error': 'Committee not found'}, 
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            users = users.filter(usercommittee__committee_id=committee_id)
+        elif scope != 'all':
+            return Response(
+                {'error': "scope must be 'all', 'role' or 'committee'"}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            rotated = access_codes.rotate_access_codes(users)
+        except access_codes.AccessCodesExhausted as e:
+            return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+        
+        return Response({
+            'message': f'Rotated {len(rotated)} access codes',
+            'rotated': [
+                {
+                    'id': user.id,
+                    'full_name': user.full_name,
+                    'old_access_code': old_access_code,
+                    'new_access_code': user.access_code
+                }
+                for user, old_access_code in rotated
+            ]
+        }, status=status.HTTP_200_OK)
     
     @action(detail=False, methods=['get'])
-    def my_committees(self, request):
-        """Get committees that the current user chairs"""
+    def export_timesheets(self, request):
+        """Export every member's time logs for a date range (admin only)"""
         try:
-            custom_user = User.objects.get(access_code=request.user.username)
-            
-            # Get committees chaired by this user
-            chaired_committees = Committee.objects.filter(chair=custom_user).order_by('name')
-            serializer = CommitteeSerializer(chaired_committees, many=True)
-            
-            return Response(serializer.data)
-        except User.DoesNotExist:
+            start_date = date.fromisoformat(request.GET.get('start_date', ''))
+            end_date = date.fromisoformat(request.GET.get('end_date', ''))
+        except ValueError:
             return Response(
-                {'error': 'User not found'}, 
-                status=status.HTTP_404_NOT_FOUND
+                {'error': 'start_date and end_date are required (YYYY-MM-DD)'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if end_date < start_date:
+            return Response(
+                {'error': 'end_date must not be before start_date'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        partition = request.GET.get('by', 'month')
+        archive = request.GET.get('archive', 'gzip')
+        if partition not in PARTITION_CHOICES or archive not in ARCHIVE_CHOICES:
+            return Response(
+                {'error': f'by must be one of {PARTITION_CHOICES}, archive one of {ARCHIVE_CHOICES}'}, 
+                status=status.HTTP_400_BAD_REQUEST
             )
+        
+        response = StreamingHttpResponse(
+            streaming_content(
+                request,
+                export_org_timesheets(start_date, end_date, partition=partition, archive=archive)
+            ),
+            content_type='application/zip' if archive == 'zip' else 'application/gzip'
+        )
+        filename = export_filename(start_date, end_date, archive)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
 
+
+class ChairViewSet(viewsets.ViewSet):
+    """Chair-specific endpoints"""
+    permission_classes = [IsChair]
+    
     @action(detail=False, methods=['get'])
     def team_summary(self, request):
         """Get team summary for chairs"""
         try:
-            custom_user = User.objects.get(access_code=request.user.username)
+            custom_user = request.user
             
             # Get all team members
-            team_members = User.objects.exclude(id=custom_user.id).order_by('full_name')
+            team_members = list(User.objects.exclude(id=custom_user.id).order_by('full_name'))
+            
+            # Who is clocked in comes from the presence registry. Hours read
+            # open sessions from the database instead, so a registry that
+            # missed a clock-out can't count a closed session twice
+            online = presence_registry.online_users(member.id for member in team_members)
             
             # Calculate team statistics
-            week_start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
-            week_start = week_start - timedelta(days=week_start.weekday())
+            now = timezone.now()
+            week_start, _ = get_week_bounds(now)
+            weekly_seconds = weekly_seconds_from_rollup(team_members, week_start, now)
             
             team_stats = []
             for member in team_members:
-                # Get this week's hours (including ongoing sessions)
-                now = timezone.now()
-                
-                # Calculate total hours for the week
-                weekly_hours = 0
-                
-                # Get all time logs for this user that overlap with the current week
-                time_logs = TimeLog.objects.filter(user=member)
-                
-                for log in time_logs:
-                    # Check if this log overlaps with the current week
-                    clock_in = log.clock_in
-                    clock_out = log.clock_out if log.clock_out else now
-                    
-                    # If session overlaps with the week, include it
-                    if clock_in <= week_start + timedelta(days=7) and clock_out >= week_start:
-                        # Calculate the overlap with the week
-                        overlap_start = max(clock_in, week_start)
-                        overlap_end = min(clock_out, week_start + timedelta(days=7))
-                        duration = overlap_end - overlap_start
-                        weekly_hours += duration.total_seconds() / 3600
-                
-                # Get active sessions
-                active_sessions = TimeLog.objects.filter(
-                    user=member,
-                    clock_out__isnull=True
-                ).count()
+                weekly_hours = weekly_seconds.get(member.id, 0) / 3600
+                active_sessions = 1 if member.id in online else 0
                 
                 team_stats.append({
                     'id': str(member.id),  # Convert to string to match frontend expectations
@@ -688,81 +741,7 @@ class AllowedIPViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         """Set the created_by field to the current user"""
-        serializer.save(created_by=self._get_custom_user())
-    
-    def _get_custom_user(self):
-        """Get the custom user from the authenticated session user"""
-        try:
-            return User.objects.get(access_code=self.request.user.username)
-        except User.DoesNotExist:
-            return None
-
-
-class IpCheckView(APIView):
-    """Check if the current IP is allowed to access the clock app"""
-    permission_classes = [permissions.AllowAny]  # Public endpoint
-    
-    def _get_client_ip(self, request):
-        """Get the real client IP address"""
-        # Check for forwarded headers first (for proxy setups)
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            # Take the first IP in the list
-            return x_forwarded_for.split(',')[0].strip()
-        
-        # Fall back to REMOTE_ADDR
-        return request.META.get('REMOTE_ADDR', '127.0.0.1')
-    
-    def _is_clock_app_request(self, request):
-        """Check if request is from clock app"""
-        origin = request.META.get('HTTP_ORIGIN', '')
-        user_agent = request.META.get('HTTP_USER_AGENT', '')
-        app_type_header = request.META.get('HTTP_X_APP_TYPE', '').lower()
-        
-        return (
-            app_type_header == 'clock' or
-            'localhost:3001' in origin or 
-            '127.0.0.1:3001' in origin or
-            'clock' in user_agent.lower()
-        )
-    
-    def get(self, request):
-        """Check IP access for clock app"""
-        client_ip = self._get_client_ip(request)
-        is_clock_app = self._is_clock_app_request(request)
-        
-        # If not a clock app request, always allow
-        if not is_clock_app:
-            return Response({
-                'allowed': True,
-                'ip_address': client_ip,
-                'message': 'Not a clock app request'
-            })
-        
-        # Check if IP is in allowed list
-        try:
-            is_allowed = AllowedIP.objects.filter(ip_address=client_ip).exists()
-            
-            if is_allowed:
-                return Response({
-                    'allowed': True,
-                    'ip_address': client_ip,
-                    'message': 'IP address is authorized'
-                })
-            else:
-                return Response({
-                    'allowed': False,
-                    'ip_address': client_ip,
-                    'message': f'IP address {client_ip} is not authorized to access the clock app. Please contact an administrator.'
-                }, status=status.HTTP_403_FORBIDDEN)
-                
-        except Exception as e:
-            # If there's any error checking the database, deny access for security
-            return Response({
-                'allowed': False,
-                'ip_address': client_ip,
-                'message': 'Error checking IP authorization. Access denied for security.'
-            }, status=status.HTTP_403_FORBIDDEN)
+        serializer.save(created_by_id=self.request.user.id)
 
 
 class CommitteeViewSet(viewsets.ModelViewSet):
@@ -781,7 +760,7 @@ class CommitteeViewSet(viewsets.ModelViewSet):
     
     def list(self, request):
         """List all committees with member information"""
-        committees = Committee.objects.all().order_by('name')
+        committees = CommitteeSerializer.setup_eager_loading(Committee.objects.all().order_by('name'))
         serializer = CommitteeSerializer(committees, many=True)
         return Response(serializer.data)
     
@@ -789,25 +768,20 @@ class CommitteeViewSet(viewsets.ModelViewSet):
         """Create a new committee"""
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
-            committee = serializer.save()
-            
-            # Update chair's role to 'chair' if they were a member
-            if committee.chair and committee.chair.role == 'member':
-                committee.chair.role = 'chair'
-                committee.chair.save()
-            
-            # Add chair to committee members if not already there
-            if committee.chair:
-                UserCommittee.objects.get_or_create(user=committee.chair, committee=committee)
-            
-            # Add additional members if provided
-            member_ids = request.data.get('members', [])
-            for member_id in member_ids:
-                try:
-                    user = User.objects.get(id=member_id)
-                    UserCommittee.objects.get_or_create(user=user, committee=committee)
-                except User.DoesNotExist:
-                    continue
+            with transaction.atomic():
+                committee = serializer.save()
+                
+                # Update chair's role to 'chair' if they were a member
+                if committee.chair and committee.chair.role == 'member':
+                    committee.chair.role = 'chair'
+                    committee.chair.save()
+                    invalidate_principal(committee.chair)
+                
+                # Add the chair and any additional members in one insert
+                member_ids = list(request.data.get('members', []))
+                if committee.chair_id:
+                    member_ids.append(committee.chair_id)
+                membership.add_members(committee, member_ids)
             
             # Return the full committee data
             return Response(CommitteeSerializer(committee).data, status=status.HTTP_201_CREATED)
@@ -821,7 +795,10 @@ class CommitteeViewSet(viewsets.ModelViewSet):
             old_chair = instance.chair
             
             serializer = self.get_serializer(instance, data=request.data, partial=partial)
-            if serializer.is_valid():
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            
+            with transaction.atomic():
                 committee = serializer.save()
                 new_chair = committee.chair
                 
@@ -834,13 +811,14 @@ class CommitteeViewSet(viewsets.ModelViewSet):
                         if not other_committees.exists() and old_chair.role != 'admin':
                             old_chair.role = 'member'
                             old_chair.save()
+                            invalidate_principal(old_chair)
                         elif old_chair.role == 'admin':
                             pass
                         else:
                             pass
                         
                         # Ensure old chair remains in committee as a member
-                        UserCommittee.objects.get_or_create(user=old_chair, committee=committee)
+                        membership.add_members(committee, [old_chair.id])
                     
                     # Handle new chair
                     if new_chair:
@@ -848,27 +826,17 @@ class CommitteeViewSet(viewsets.ModelViewSet):
                         if new_chair.role == 'member':
                             new_chair.role = 'chair'
                             new_chair.save()
+                            invalidate_principal(new_chair)
                         
                         # Add new chair to committee members if not already there
-                        UserCommittee.objects.get_or_create(user=new_chair, committee=committee)
+                        membership.add_members(committee, [new_chair.id])
                 
-                # Handle member updates if provided
+                # Replace the member list if provided, keeping the chair
                 if 'members' in request.data:
-                    member_ids = request.data.get('members', [])
-                    # Remove all current members except chair
-                    UserCommittee.objects.filter(committee=committee).exclude(user=committee.chair).delete()
-                    # Add new members
-                    for member_id in member_ids:
-                        try:
-                            user = User.objects.get(id=member_id)
-                            UserCommittee.objects.get_or_create(user=user, committee=committee)
-                        except User.DoesNotExist:
-                            continue
+                    membership.set_members(committee, request.data.get('members', []), keep=[committee.chair_id])
                 
-                # Return the full committee data
-                return Response(CommitteeSerializer(committee).data)
-            else:
-                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            # Return the full committee data
+            return Response(CommitteeSerializer(committee).data)
         except Exception as e:
             return Response(
                 {'error': f'Failed to update committee: {str(e)}'}, 
@@ -882,13 +850,8 @@ class CommitteeViewSet(viewsets.ModelViewSet):
             committee = Committee.objects.get(id=pk)
             member_ids = request.data.get('member_ids', [])
             
-            # Add members to committee
-            for member_id in member_ids:
-                try:
-                    user = User.objects.get(id=member_id)
-                    UserCommittee.objects.get_or_create(user=user, committee=committee)
-                except User.DoesNotExist:
-                    continue
+            # Add members to committee, skipping unknown ids and existing members
+            membership.add_members(committee, member_ids)
             
             return Response(CommitteeSerializer(committee).data)
         except Committee.DoesNotExist:
@@ -905,10 +868,7 @@ class CommitteeViewSet(viewsets.ModelViewSet):
             member_ids = request.data.get('member_ids', [])
             
             # Remove members from committee
-            UserCommittee.objects.filter(
-                committee=committee,
-                user_id__in=member_ids
-            ).delete()
+            membership.remove_members(committee, member_ids)
             
             return Response(CommitteeSerializer(committee).data)
         except Committee.DoesNotExist:
@@ -917,6 +877,26 @@ class CommitteeViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
     
+    @action(detail=True, methods=['post'])
+    def set_members(self, request, pk=None):
+        """Replace a committee's members (the chair always stays a member)"""
+        try:
+            committee = Committee.objects.get(id=pk)
+            member_ids = request.data.get('member_ids', [])
+            
+            # Insert the missing and delete the removed memberships
+            added, removed = membership.set_members(committee, member_ids, keep=[committee.chair_id])
+            
+            data = CommitteeSerializer(committee).data
+            data['added'] = sorted(added)
+            data['removed'] = sorted(removed)
+            return Response(data)
+        except Committee.DoesNotExist:
+            return Response(
+                {'error': 'Committee not found'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+    
     def destroy(self, request, *args, **kwargs):
         """Delete a committee and handle chair role downgrade"""
         try:
@@ -931,6 +911,7 @@ class CommitteeViewSet(viewsets.ModelViewSet):
                 if not other_committees.exists() and chair.role != 'admin':
                     chair.role = 'member'
                     chair.save()
+                    invalidate_principal(chair)
                 elif chair.role == 'admin':
                     pass
                 else:
@@ -943,4 +924,210 @@ class CommitteeViewSet(viewsets.ModelViewSet):
             return Response(
                 {'error': f'Failed to delete committee: {str(e)}'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            ) 
\ No newline at end of file
+            ) 
+
+
+async def presence_stream(request):
+    """
+    Live presence as Server-Sent Events, instead of polling current_status
+    or team_summary: a snapshot of who is clocked in, then an event per
+    clock-in and clock-out. Chairs see the committees they chair, admins
+    everyone; ?committee_id narrows it to one committee. Needs the ASGI
+    server, since a WSGI worker would be held for the whole stream.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'Presence stream is only served over ASGI'}, 
+            status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+    
+    principal = await sync_to_async(get_principal)(request)
+    if principal is None:
+        return JsonResponse(
+            {'error': 'Authentication required'}, 
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+    
+    committee_id = request.GET.get('committee_id')
+    if committee_id:
+        try:
+            committee_id = int(committee_id)
+        except ValueError:
+            return JsonResponse(
+                {'error': 'A valid committee_id is required'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    
+    try:
+        scope = await sync_to_async(presence.presence_scope)(principal, committee_id)
+    except PermissionDenied as e:
+        return JsonResponse({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+    
+    response = StreamingHttpResponse(
+        presence.stream_presence(scope), 
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Don't let proxies buffer the stream
+    return response
+
+
+# Read-heavy endpoints served as async views, so a worker keeps serving
+# other requests while these wait on the database. DRF has no async views;
+# these are plain Django views answering the way the DRF ones did.
+
+async def _authorize(request, roles=None):
+    """
+    Return (principal, None) for an authenticated request whose role is in
+    `roles` (default: any), or (None, response) with DRF's 403
+    """
+    # The session stores override load(), which the async session API
+    # would bypass, so the principal is read in a thread
+    principal = await sync_to_async(get_principal)(request)
+    if principal is None:
+        return None, JsonResponse(
+            {'detail': 'Authentication credentials were not provided.'}, 
+            status=status.HTTP_403_FORBIDDEN
+        )
+    if roles is not None and principal.role not in roles:
+        return None, JsonResponse(
+            {'detail': 'You do not have permission to perform this action.'}, 
+            status=status.HTTP_403_FORBIDDEN
+        )
+    return principal, None
+
+
+@require_GET
+async def me(request):
+    """Get current authenticated user information"""
+    principal, denied = await _authorize(request)
+    if denied:
+        return denied
+    
+    return JsonResponse({
+        'user_id': principal.id,
+        'access_code': principal.access_code,
+        'full_name': principal.full_name,
+        'role': principal.role
+    })
+
+
+@require_GET
+async def current_status(request):
+    """Get current clock status for authenticated user"""
+    principal, denied = await _authorize(request)
+    if denied:
+        return denied
+    
+    # Get current active session
+    active_log = await TimeLog.objects.filter(
+        user_id=principal.id,
+        clock_out__isnull=True
+    ).select_related('user').afirst()
+    
+    return JsonResponse({
+        'is_clocked_in': active_log is not None,
+        'current_session': TimeLogSerializer(active_log).data if active_log else None
+    })
+
+
+@require_GET
+async def admin_dashboard(request):
+    """Get system statistics for admin dashboard"""
+    _, denied = await _authorize(request, roles=('admin',))
+    if denied:
+        return denied
+    
+    try:
+        # Cached and refreshed in the background; ?approximate=true takes
+        # the time log count from planner statistics
+        approximate = request.GET.get('approximate')
+        if approximate is not None:
+            approximate = approximate.lower() in ('1', 'true', 'yes')
+        
+        payload, age = await dashboard.aget_dashboard(approximate)
+        response = JsonResponse(payload)
+        response['Age'] = str(age)
+        return response
+    except Exception as e:
+        return JsonResponse(
+            {'error': str(e)}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@require_GET
+async def my_committees(request):
+    """Get committees that the current user chairs"""
+    principal, denied = await _authorize(request, roles=('chair', 'admin'))
+    if denied:
+        return denied
+    
+    # Get committees chaired by this user
+    chaired_committees = CommitteeSerializer.setup_eager_loading(
+        Committee.objects.filter(chair_id=principal.id).order_by('name')
+    )
+    committees = [committee async for committee in chaired_committees]
+    
+    return JsonResponse(CommitteeSerializer(committees, many=True).data, safe=False)
+
+
+def _get_client_ip(request):
+    """Get the real client IP address"""
+    # Check for forwarded headers first (for proxy setups)
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        # Take the first IP in the list
+        return x_forwarded_for.split(',')[0].strip()
+    
+    # Fall back to REMOTE_ADDR
+    return request.META.get('REMOTE_ADDR', '127.0.0.1')
+
+
+def _is_clock_app_request(request):
+    """Check if request is from clock app"""
+    origin = request.META.get('HTTP_ORIGIN', '')
+    user_agent = request.META.get('HTTP_USER_AGENT', '')
+    app_type_header = request.META.get('HTTP_X_APP_TYPE', '').lower()
+    
+    return (
+        app_type_header == 'clock' or
+        'localhost:3001' in origin or 
+        '127.0.0.1:3001' in origin or
+        'clock' in user_agent.lower()
+    )
+
+
+@require_GET
+async def ip_check(request):
+    """Check if the current IP is allowed to access the clock app (public)"""
+    client_ip = _get_client_ip(request)
+    
+    # If not a clock app request, always allow
+    if not _is_clock_app_request(request):
+        return JsonResponse({
+            'allowed': True,
+            'ip_address': client_ip,
+            'message': 'Not a clock app request'
+        })
+    
+    # Check if IP is in allowed list
+    try:
+        if await ais_ip_allowed(client_ip):
+            return JsonResponse({
+                'allowed': True,
+                'ip_address': client_ip,
+                'message': 'IP address is authorized'
+            })
+        return JsonResponse({
+            'allowed': False,
+            'ip_address': client_ip,
+            'message': f'IP address {client_ip} is not authorized to access the clock app. Please contact an administrator.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    except Exception:
+        # If there's any error checking the database, deny access for security
+        return JsonResponse({
+            'allowed': False,
+            'ip_address': client_ip,
+            'message': 'Error checking IP authorization. Access denied for security.'
+        }, status=status.HTTP_403_FORBIDDEN)
\ No newline at end of file
@@ -92,7 +92,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.SessionAuthentication',
+        'core.principal.PrincipalAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -108,7 +108,16 @@ AUTHENTICATION_BACKENDS = [
 ]
 
 # Session settings - improved security configuration
-SESSION_ENGINE = 'core.session'  # Use custom session store for app-specific sessions
+# Use custom session store for app-specific sessions. SESSION_STORE=cached_db
+# switches to the cached variant that reads from the 'sessions' cache below
+# and only writes to the database when a session changes.
+SESSION_STORE = os.getenv('SESSION_STORE', 'db').lower()
+SESSION_ENGINE = 'core.session_cached' if SESSION_STORE == 'cached_db' else 'core.session'
+SESSION_CACHE_ALIAS = 'sessions'
+# With the cached store, keep clock sessions in the cache only (no DB rows)
+CLOCK_SESSION_CACHE_ONLY = os.getenv('CLOCK_SESSION_CACHE_ONLY', 'False').lower() == 'true'
+# 'signed_cookie' keeps clock sessions in a signed cookie instead of any server-side store
+CLOCK_SESSION_STORE = os.getenv('CLOCK_SESSION_STORE', 'server').lower()
 SESSION_COOKIE_HTTPONLY = True  # SECURITY: Prevent XSS attacks by blocking JS access
 SESSION_SAVE_EVERY_REQUEST = True  # Update session on every request
 
@@ -133,9 +142,78 @@ HUB_APP_SESSION_CONFIG = {
     'SESSION_COOKIE_DOMAIN': None,  # Use current domain only
 }
 
+# Caches. The sessions and shared caches must be shared by every worker
+# process (the file-based defaults are shared by all workers on one host).
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('SESSION_CACHE_LOCATION', '/tmp/sga_time_tracking_sessions'),
+    },
+    # State every worker must see the same: session role versions, the IP
+    # allowlist version, the presence registry and the admin dashboard
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('SHARED_CACHE_LOCATION', '/tmp/sga_time_tracking_shared'),
+    },
+}
+
 # Absolute lifetime cap for Hub sessions (seconds)
 HUB_ABSOLUTE_SESSION_AGE = int(os.getenv('HUB_ABSOLUTE_SESSION_AGE', str(12 * 3600)))
 
+# Coalesce hub session writes: when a request leaves the session unchanged,
+# only persist the refreshed sliding expiry once this fraction of the window
+# has passed since the last write (e.g. 0.1 = at most every 6 minutes for a
+# 1 hour window). 0 writes on every request.
+HUB_SESSION_REFRESH_FRACTION = float(os.getenv('HUB_SESSION_REFRESH_FRACTION', '0'))
+
+# How long a user's role version is trusted from the shared cache before the
+# session principal is re-checked against the database (seconds). Role and
+# access code changes invalidate it in every worker at once.
+PRINCIPAL_VERSION_CACHE_TIMEOUT = int(os.getenv('PRINCIPAL_VERSION_CACHE_TIMEOUT', '60'))
+
+# Lifetime of the clock app IP allowlist version token (seconds). Workers
+# recompile their in-memory allowlist when it changes or expires.
+ALLOWED_IP_CACHE_TIMEOUT = int(os.getenv('ALLOWED_IP_CACHE_TIMEOUT', '60'))
+
+# Worker processes rendering organisation-wide timesheet exports in parallel
+EXPORT_WORKERS = int(os.getenv('EXPORT_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+# Oldest punch a kiosk may upload through the offline sync, in hours. Size
+# it to how long a kiosk can queue punches while offline: anything older is
+# rejected, since the endpoint trusts client timestamps
+PUNCH_SYNC_MAX_AGE_HOURS = int(os.getenv('PUNCH_SYNC_MAX_AGE_HOURS', '24'))
+
+# Fans clock-in/out events out to presence streams; with several worker
+# processes use 'core.presence.PostgresPresenceBroker' (LISTEN/NOTIFY)
+PRESENCE_BROKER = os.getenv('PRESENCE_BROKER', 'core.presence.LocalPresenceBroker')
+# Seconds between keep-alive comments on an idle presence stream
+PRESENCE_HEARTBEAT = int(os.getenv('PRESENCE_HEARTBEAT', '15'))
+# Seconds the shared who-is-online registry lives before it is rebuilt from
+# the open-shift index (clock-ins and clock-outs keep it current meanwhile)
+PRESENCE_REGISTRY_TIMEOUT = int(os.getenv('PRESENCE_REGISTRY_TIMEOUT', '300'))
+
+# Admin dashboard cache: served as-is for DASHBOARD_FRESH_SECONDS, then
+# recomputed in the background while the stale copy is still served
+DASHBOARD_FRESH_SECONDS = int(os.getenv('DASHBOARD_FRESH_SECONDS', '30'))
+DASHBOARD_MAX_STALE_SECONDS = int(os.getenv('DASHBOARD_MAX_STALE_SECONDS', '3600'))
+# Count time logs from Postgres planner statistics instead of COUNT(*)
+DASHBOARD_APPROXIMATE_COUNTS = os.getenv('DASHBOARD_APPROXIMATE_COUNTS', 'False').lower() == 'true'
+
+# Monthly time_logs partitions created ahead of time, and how many recent
+# months keep a btree clock_in index before switching to BRIN
+TIME_LOG_PARTITION_MONTHS_AHEAD = int(os.getenv('TIME_LOG_PARTITION_MONTHS_AHEAD', '3'))
+TIME_LOG_BTREE_MONTHS = int(os.getenv('TIME_LOG_BTREE_MONTHS', '3'))
+# Closed logs older than this many months are moved by archive_time_logs into
+# compressed monthly files under TIME_LOG_ARCHIVE_DIR, which must be on
+# persistent storage shared by every worker (a mounted volume in production).
+# There is no default outside development: archiving refuses to run until it
+# is set, rather than delete rows into storage the next deploy wipes
+TIME_LOG_RETENTION_MONTHS = int(os.getenv('TIME_LOG_RETENTION_MONTHS', '6'))
+TIME_LOG_ARCHIVE_DIR = os.getenv('TIME_LOG_ARCHIVE_DIR', '')
+
 # CORS settings - base configuration
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOW_ALL_ORIGINS = False  # Keep this False for security
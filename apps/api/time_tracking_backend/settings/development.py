@@ -8,6 +8,9 @@ from .base import *
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+# Time log archive files default to a gitignored directory in the source tree
+TIME_LOG_ARCHIVE_DIR = TIME_LOG_ARCHIVE_DIR or str(BASE_DIR / 'archive')
+
 # Allowed hosts for development
 ALLOWED_HOSTS = ['localhost', '127.0.0.1', '0.0.0.0', 'api']
 
@@ -38,7 +38,9 @@ if not ALLOWED_HOSTS:
 DATABASES = {
     'default': dj_database_url.config(
         default=os.getenv('DATABASE_URL'),
-        conn_max_age=600,
+        # Persistent connections leak under ASGI, where sync code runs in
+        # per-request threads
+        conn_max_age=int(os.getenv('DB_CONN_MAX_AGE', '0')),
         conn_health_checks=True,
     )
 }
@@ -56,6 +58,10 @@ if not DATABASES['default']:
         }
     }
 
+# Several gunicorn workers each hold presence streams, so relay events
+# between them through Postgres
+PRESENCE_BROKER = os.getenv('PRESENCE_BROKER', 'core.presence.PostgresPresenceBroker')
+
 # Static files - Whitenoise configuration
 MIDDLEWARE.insert(1, 'whitenoise.middleware.WhiteNoiseMiddleware')
 
@@ -152,11 +158,9 @@ LOGGING = {
 }
 
 # Cache configuration (optional - for better performance)
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
-    }
+CACHES['default'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'unique-snowflake',
 }
 
 # Email configuration (if needed for notifications)
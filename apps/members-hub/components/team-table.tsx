@@ -5,7 +5,6 @@ import type { TeamMember } from "@/lib/types"
 import { useAuth } from "@/contexts/auth-context"
 import { createRoleBasedApi } from "@/lib/role-based-api"
 import { api } from "@/lib/api"
-import { DashboardService } from "@/lib/dashboard-service"
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@workspace/ui/components/card"
 import { Table, TableBody, TableCell, TableHead, TableHeader, TableRow } from "@workspace/ui/components/table"
 import { Button } from "@workspace/ui/components/button"
@@ -35,7 +34,6 @@ export function TeamTable({ committeeId, committeeName }: TeamTableProps) {
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
   const [weekOffset, setWeekOffset] = useState(0)
-  const [weeklyTotals, setWeeklyTotals] = useState<Record<string, number>>({})
 
   useEffect(() => {
     if (user) {
@@ -43,13 +41,6 @@ export function TeamTable({ committeeId, committeeName }: TeamTableProps) {
     }
   }, [user, committeeId])
 
-  useEffect(() => {
-    if (teamMembers.length > 0) {
-      loadWeeklyTotals()
-    }
-    // eslint-disable-next-line
-  }, [teamMembers, weekOffset])
-
   const loadTeamMembers = async () => {
     if (!user) return
     try {
@@ -65,29 +56,11 @@ export function TeamTable({ committeeId, committeeName }: TeamTableProps) {
     }
   }
 
-  // For each member, fetch their timesheet and calculate stats using the same method as dashboard
-  const loadWeeklyTotals = async () => {
-    setWeeklyTotals({})
-    const totals: Record<string, number> = {}
-    
-    await Promise.all(
-      teamMembers.map(async (member) => {
-        try {
-          // Get all time entries for this member (same as dashboard)
-          const timeEntriesResp = await api.getMemberTimesheet(member.id)
-          const allEntries = Array.isArray(timeEntriesResp) ? timeEntriesResp : (timeEntriesResp as any).results || timeEntriesResp
-          
-          // Use the exact same calculation as dashboard
-          const stats = DashboardService.calculateStats(allEntries, new Date())
-          
-          totals[member.id] = stats.totalHours
-        } catch (e) {
-          totals[member.id] = 0
-        }
-      })
-    )
-    setWeeklyTotals(totals)
-  }
+  // This week's hours come with the team list, summed by the API from the
+  // weekly rollup, so no member's timesheet has to be fetched
+  const weeklyTotals: Record<string, number> = Object.fromEntries(
+    teamMembers.map((member) => [member.id, member.totalHoursThisWeek || 0])
+  )
 
   const handleExportCSV = () => {
     // Prepare CSV header
@@ -2,6 +2,7 @@
 
 import React, { createContext, useContext, useState, useEffect, useRef, useMemo, useCallback } from 'react'
 import { api } from '@/lib/api'
+import { useAuth } from '@/contexts/auth-context'
 import { DashboardService } from '@/lib/dashboard-service'
 import type { DashboardStats } from '@/lib/dashboard-service'
 import type { TimeEntry } from '@/lib/api'
@@ -35,6 +36,7 @@ export function TimeTrackingProvider({ children }: { children: React.ReactNode }
   const [stats, setStats] = useState<DashboardStats | null>(null)
   const [displayTicker, setDisplayTicker] = useState(0)
   const [loading, setLoading] = useState(true)
+  const { user } = useAuth()
   const activeSessionRef = useRef<TimeEntry | null>(null)
   const displayIntervalRef = useRef<NodeJS.Timeout | null>(null)
 
@@ -118,16 +120,51 @@ export function TimeTrackingProvider({ children }: { children: React.ReactNode }
     // Initial load
     refreshData()
     
-    // Refresh every 10 seconds to check for changes
-    const interval = setInterval(refreshData, 10000)
+    if (!user) {
+      return
+    }
+    
+    // Refresh when the presence stream reports one of our own punches
+    // (from any device or kiosk) instead of polling
+    const stream = api.openPresenceStream()
+    const onClockEvent = (event: MessageEvent) => {
+      const data = JSON.parse(event.data)
+      if (String(data.user_id) === String(user.id)) {
+        refreshData()
+      }
+    }
+    stream.addEventListener('clock_in', onClockEvent)
+    stream.addEventListener('clock_out', onClockEvent)
+    // The stream starts with a snapshot on every (re)connect; resync then
+    // in case a punch was missed while disconnected
+    stream.addEventListener('snapshot', () => refreshData())
+    
+    // Poll every 10 seconds while the stream is down. EventSource gives up
+    // for good on a non-200 response (e.g. 501 under a WSGI dev server), so
+    // this keeps the hub current there too
+    let pollInterval: NodeJS.Timeout | null = null
+    stream.addEventListener('error', () => {
+      if (!pollInterval) {
+        pollInterval = setInterval(refreshData, 10000)
+      }
+    })
+    stream.addEventListener('open', () => {
+      if (pollInterval) {
+        clearInterval(pollInterval)
+        pollInterval = null
+      }
+    })
     
     return () => {
-      clearInterval(interval)
+      stream.close()
+      if (pollInterval) {
+        clearInterval(pollInterval)
+      }
       if (displayIntervalRef.current) {
         clearInterval(displayIntervalRef.current)
       }
     }
-  }, [refreshData])
+  }, [refreshData, user])
 
   // Centralized function to get weekly hours with real-time updates for active sessions
   const getWeeklyHours = useCallback((weekOffset: number = 0) => {
@@ -21,7 +21,7 @@ export interface TimeEntry {
 }
 
 export interface PaginatedResponse<T> {
-  count: number;
+  count?: number;  // Not sent by keyset-paginated endpoints
   next: string | null;
   previous: string | null;
   results: T[];
@@ -124,6 +124,13 @@ class ApiClient {
     return this.request<PaginatedResponse<TimeEntry> | TimeEntry[]>('/time-logs/');
   }
 
+  // Live clock-ins and clock-outs as Server-Sent Events. EventSource can't
+  // send X-App-Type, so the /hub/ path marks it as a hub request.
+  openPresenceStream(committeeId?: string): EventSource {
+    const query = committeeId ? `?committee_id=${encodeURIComponent(committeeId)}` : '';
+    return new EventSource(`${this.baseUrl}/hub/presence/${query}`, { withCredentials: true });
+  }
+
   // Additional methods for hub functionality
   async getTimeEntriesForWeek(userId?: string, weekOffset: number = 0): Promise<TimeEntry[]> {
     // For now, return all entries - backend doesn't support week filtering yet
@@ -160,7 +167,7 @@ class ApiClient {
   }
 
   async getMemberTimesheet(memberId: string): Promise<TimeEntry[]> {
-    return this.request<TimeEntry[]>(`/team/${memberId}/member_timesheet/`);
+    return this.requestAllPages<TimeEntry>(`/team/${memberId}/member_timesheet/?page_size=100`);
   }
 
   // Admin endpoints
@@ -260,18 +267,22 @@ class ApiClient {
   }
 
   async getAllTimeEntries(): Promise<TimeEntry[]> {
-    let url = '/time-logs/';
-    let allEntries: TimeEntry[] = [];
+    return this.requestAllPages<TimeEntry>('/time-logs/');
+  }
+
+  // Follow 'next' links of a paginated endpoint and return every result
+  private async requestAllPages<T>(url: string): Promise<T[]> {
+    let allResults: T[] = [];
     while (url) {
-      const response = await this.request<PaginatedResponse<TimeEntry>>(url);
-      allEntries = allEntries.concat(response.results);
+      const response = await this.request<PaginatedResponse<T>>(url);
+      allResults = allResults.concat(response.results);
       url = response.next
         ? response.next.startsWith('http')
           ? response.next.replace(this.baseUrl, '')
           : response.next
         : '';
     }
-    return allEntries;
+    return allResults;
   }
 
   // Committee management endpoints